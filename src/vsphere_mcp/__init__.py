@@ -3,16 +3,36 @@
 vSphere MCP Server
 
 一个基于 MCP 最佳实践的 vSphere 虚拟机管理服务器。
+
+导出的符号按需加载（PEP 562），``import vsphere_mcp`` 本身不会导入
+pyvmomi / mcp 等重量级依赖。
 """
 
-from .server import mcp, run_server
-from .client import VSphereClient, get_vsphere_client
-from .models import MCPResult, MCPError, ErrorType
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .server import mcp, get_mcp, run_server
+    from .client import VSphereClient, get_vsphere_client
+    from .models import MCPResult, MCPError, ErrorType
 
 __version__ = "0.1.0"
 
+# 导出名称 -> 所在子模块
+_DYNAMIC_IMPORTS = {
+    "mcp": ".server",
+    "get_mcp": ".server",
+    "run_server": ".server",
+    "VSphereClient": ".client",
+    "get_vsphere_client": ".client",
+    "MCPResult": ".models",
+    "MCPError": ".models",
+    "ErrorType": ".models",
+}
+
 __all__ = [
     "mcp",
+    "get_mcp",
     "run_server",
     "VSphereClient",
     "get_vsphere_client",
@@ -20,3 +40,18 @@ __all__ = [
     "MCPError",
     "ErrorType",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """首次访问时导入对应子模块，并缓存到模块全局"""
+    module_name = _DYNAMIC_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -6,11 +6,19 @@ vSphere MCP Server - 客户端包导出
 from .vsphere import (
     VSphereClient,
     get_vsphere_client,
+    acquire_vsphere_client,
+    keepalive_vsphere_client,
+    close_vsphere_client,
+    reset_vsphere_client,
     PYVMOMI_AVAILABLE,
 )
 
 __all__ = [
     "VSphereClient",
     "get_vsphere_client",
+    "acquire_vsphere_client",
+    "keepalive_vsphere_client",
+    "close_vsphere_client",
+    "reset_vsphere_client",
     "PYVMOMI_AVAILABLE",
 ]
@@ -5,30 +5,26 @@ vSphere MCP Server - vSphere 客户端模块
 封装与 vSphere/vCenter 的所有交互
 """
 
-import os
+from __future__ import annotations
+
+import re
+import time
 import logging
-from typing import Optional, List, Tuple
+import threading
+import importlib.util
+from typing import TYPE_CHECKING, Any, Optional, List, Tuple, Dict
 
-# 尝试导入 pyvmomi (vSphere Python SDK)
-try:
+if TYPE_CHECKING:
     from pyVim.connect import SmartConnect, Disconnect
     from pyVmomi import vim, vmodl
-    PYVMOMI_AVAILABLE = True
-except ImportError:
-    PYVMOMI_AVAILABLE = False
-    vim = None  # type: ignore
-
-from ..models import (
-    ErrorType,
-    MCPError,
-    VMInfo,
-    VMTemplateInfo,
-    HostInfo,
-    ClusterInfo,
-    FolderInfo,
-    ResourcePoolInfo,
-    NetworkInfo,
-)
+
+# pyvmomi (vSphere Python SDK) 导入时需要加载庞大的类型目录，
+# 这里只探测是否安装，真正的导入推迟到首次连接时
+PYVMOMI_AVAILABLE = importlib.util.find_spec("pyVmomi") is not None
+SmartConnect = Disconnect = vim = vmodl = None  # type: ignore
+
+from ..config import load_config
+from ..models import ErrorType, MCPError
 from ..utils.errors import (
     TOOL_DESCRIBE_TEMPLATES,
     TOOL_DESCRIBE_CLUSTERS,
@@ -37,20 +33,139 @@ from ..utils.errors import (
     TOOL_DESCRIBE_NETWORKS,
     parse_vsphere_error,
 )
+from ..utils.concurrency import run_blocking
 
 
 logger = logging.getLogger(__name__)
 
+# 错误响应共享的 related_tools 列表（MCPError 不可变，列表不会被修改）
+_RELATED_TEMPLATES = [TOOL_DESCRIBE_TEMPLATES]
+_RELATED_CLUSTERS = [TOOL_DESCRIBE_CLUSTERS]
+_RELATED_RESOURCE_POOLS = [TOOL_DESCRIBE_RESOURCE_POOLS]
+_RELATED_FOLDERS = [TOOL_DESCRIBE_FOLDERS]
+_RELATED_NETWORKS = [TOOL_DESCRIBE_NETWORKS]
+
+_ERR_MISSING_CONFIG = MCPError.model_construct(
+    error_type=ErrorType.MISSING_PARAMETER,
+    message="vSphere 连接配置不完整",
+    suggestion="请设置环境变量: VSPHERE_HOST, VSPHERE_USERNAME, VSPHERE_PASSWORD"
+)
+
+# 虚拟机 BIOS UUID / 实例 UUID 格式
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}')
+
+# 取用全局客户端时，距上次会话检查超过该秒数则先确认会话仍然有效
+_SESSION_CHECK_INTERVAL = 30.0
+
+# RetrievePropertiesEx 每页返回的对象数
+_RETRIEVE_PAGE_SIZE = 1000
+
+# 各查询方法通过 PropertyCollector 批量读取的属性路径
+_TEMPLATE_PROPERTIES = [
+    "name",
+    "config.template",
+    "config.guestFullName",
+    "config.hardware.numCPU",
+    "config.hardware.memoryMB",
+    "config.hardware.device",
+    "runtime.host",
+]
+_VM_PROPERTIES = _TEMPLATE_PROPERTIES + [
+    "runtime.powerState",
+    "guest.hostName",
+    "guest.ipAddress",
+    "network",
+    "parent",
+]
+# get_virtual_machines 按 fields 只读取所需属性：VMInfo 字段 -> 属性路径
+_VM_FIELD_PROPERTIES = {
+    "power_state": ["runtime.powerState"],
+    "guest_os": ["config.guestFullName"],
+    "num_cpu": ["config.hardware.numCPU"],
+    "memory_mb": ["config.hardware.memoryMB"],
+    "host_name": ["runtime.host"],
+    "cluster_name": ["runtime.host"],
+    "folder_path": ["parent"],
+    "guest_hostname": ["guest.hostName"],
+    "ip_address": ["guest.ipAddress"],
+    "total_disk_gb": ["config.hardware.device"],
+    "networks": ["network"],
+}
+_HOST_PROPERTIES = [
+    "name",
+    "parent",
+    "summary.hardware.numCpuCores",
+    "summary.hardware.cpuMhz",
+    "summary.hardware.memorySize",
+    "summary.quickStats.overallCpuUsage",
+    "summary.quickStats.overallMemoryUsage",
+]
+_RESOURCE_POOL_PROPERTIES = [
+    "name",
+    "parent",
+    "config.cpuAllocation.limit",
+    "config.memoryAllocation.limit",
+]
+
+
+def _compact(**fields: Any) -> Dict[str, Any]:
+    """构造查询结果字典，省略值为 None 的字段（与模型的 exclude_none 输出一致）"""
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def _names(rows: List[Tuple[object, Dict[str, Any]]]) -> Dict[object, str]:
+    """从属性查询结果构造对象到名称的映射"""
+    return {obj: props["name"] for obj, props in rows if "name" in props}
+
+
+def _host_placement_requests() -> List[Tuple[Any, List[str]]]:
+    """主机归属查询：主机的 name/parent 和集群名称（vim 按需导入，不能作为模块常量）"""
+    return [
+        (vim.HostSystem, ["name", "parent"]),
+        (vim.ClusterComputeResource, ["name"]),
+    ]
+
+
+def _load_pyvmomi() -> None:
+    """按需导入 pyvmomi，并绑定到模块全局"""
+    global SmartConnect, Disconnect, vim, vmodl
+    if vim is not None:
+        return
+
+    from pyVim import connect
+    from pyVmomi import vim as _vim, vmodl as _vmodl
+
+    SmartConnect = connect.SmartConnect
+    Disconnect = connect.Disconnect
+    vmodl = _vmodl
+    vim = _vim
+
 
 class VSphereClient:
     """vSphere 客户端封装 - 管理连接和基本操作"""
 
-    def __init__(self, host: str, username: str, password: str, port: int = 443):
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        port: int = 443,
+        http_timeout: Optional[float] = None
+    ):
         self.host = host
         self.username = username
         self.password = password
         self.port = port
+        self.http_timeout = http_timeout
         self._connection = None
+        # ServiceContent 在会话期间不变，首次获取后复用
+        self._content = None
+        # 按 vim 类型缓存的 ContainerView，连接期间复用，断开时销毁
+        self._view_cache: Dict[type, object] = {}
+        # 工具调用在线程池中执行，创建 ContainerView 时加锁避免重复创建
+        self._view_lock = threading.Lock()
+        # 最近一次确认会话有效的时间（time.monotonic）
+        self._session_checked_at = 0.0
 
     def connect(self) -> Optional[MCPError]:
         """连接到 vSphere"""
@@ -62,13 +177,18 @@ class VSphereClient:
                     suggestion="运行 'pip install pyvmomi' 安装 vSphere Python SDK"
                 )
 
+            _load_pyvmomi()
+            # SOAP 连接默认启用 gzip 压缩响应和 HTTP keep-alive 连接池；
+            # 这里只补充请求超时，避免 vCenter 无响应时工作线程被无限期占用
             self._connection = SmartConnect(
                 host=self.host,
                 user=self.username,
                 pwd=self.password,
                 port=self.port,
-                disableSslCertValidation=True
+                disableSslCertValidation=True,
+                httpConnectionTimeout=self.http_timeout
             )
+            self._session_checked_at = time.monotonic()
             return None
 
         except Exception as e:
@@ -76,6 +196,8 @@ class VSphereClient:
 
     def disconnect(self):
         """断开连接"""
+        self.close_views()
+        self._content = None
         if self._connection:
             Disconnect(self._connection)
             self._connection = None
@@ -84,29 +206,260 @@ class VSphereClient:
         """检查是否已连接"""
         return self._connection is not None
 
+    def keepalive(self) -> bool:
+        """
+        检查会话是否仍然有效
+
+        读取 currentSession 本身就是一次请求，会刷新 vCenter 的空闲计时
+        （默认 30 分钟无操作即失效）。只有服务端明确表示会话已失效
+        （currentSession 为空或 NotAuthenticated）时才返回 False；
+        超时、网络错误等暂时性故障不能说明会话失效，返回 True 并在下次取用时重新检查
+        """
+        content = self.get_content()
+        if not content:
+            return False
+        try:
+            alive = content.sessionManager.currentSession is not None
+        except vim.fault.NotAuthenticated:
+            return False
+        except Exception as e:
+            logger.warning("vSphere 会话检查失败: %s", e)
+            return True
+        if alive:
+            self._session_checked_at = time.monotonic()
+        return alive
+
+    def session_fresh(self, max_age: float) -> bool:
+        """最近 max_age 秒内是否确认过会话有效（不发请求）"""
+        return time.monotonic() - self._session_checked_at < max_age
+
+    def session_valid(self, max_age: float) -> bool:
+        """最近 max_age 秒内确认过会话有效则直接返回 True，否则调用 keepalive 重新检查"""
+        if self.session_fresh(max_age):
+            return True
+        return self.keepalive()
+
     def get_content(self):
-        """获取 vSphere 内容"""
+        """获取 vSphere 内容（ServiceContent），每个连接只请求一次"""
         if not self._connection:
             return None
-        return self._connection.RetrieveContent()
+        if self._content is None:
+            self._content = self._connection.RetrieveContent()
+        return self._content
+
+    def close_views(self):
+        """销毁缓存的 ContainerView"""
+        views, self._view_cache = self._view_cache, {}
+        for view in views.values():
+            try:
+                view.Destroy()
+            except Exception as e:
+                logger.warning("销毁 ContainerView 失败: %s", e)
 
-    def find_object_by_name(self, name: str, vim_type):
-        """根据名称查找对象"""
+    def _get_view(self, content, vim_type):
+        """
+        获取指定类型的 ContainerView
+
+        ContainerView 的 view 属性由服务端随清单变化自动更新，可以跨请求复用，
+        省去每次查询的 CreateContainerView + Destroy 两次 RPC
+        """
+        view = self._view_cache.get(vim_type)
+        if view is None:
+            with self._view_lock:
+                view = self._view_cache.get(vim_type)
+                if view is None:
+                    view = content.viewManager.CreateContainerView(
+                        content.rootFolder, [vim_type], True
+                    )
+                    self._view_cache[vim_type] = view
+        return view
+
+    def find_by_path(self, inventory_path: str):
+        """
+        按清单路径查找对象，如 '/Datacenter/vm/Templates/ubuntu-template'
+
+        SearchIndex 在服务端按路径逐级定位，一次请求完成，不需要遍历整个清单
+        """
         content = self.get_content()
         if not content:
             return None
+        return content.searchIndex.FindByInventoryPath(inventory_path.strip("/"))
 
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim_type], True
+    def find_vm_by_uuid(self, uuid: str):
+        """按 BIOS UUID 或实例 UUID 查找虚拟机，SearchIndex 服务端索引查找，一次请求完成"""
+        content = self.get_content()
+        if not content:
+            return None
+        search_index = content.searchIndex
+        return (
+            search_index.FindByUuid(None, uuid, True, False)
+            or search_index.FindByUuid(None, uuid, True, True)
         )
 
-        for obj in container.view:
-            if obj.name == name:
-                container.Destroy()
-                return obj
+    def find_object_by_name(self, name: str, vim_type):
+        """
+        根据名称查找对象
+
+        名称中包含 '/' 时视为清单路径，只用 find_by_path 查找，路径不存在或类型不符时返回 None
+        （不退回按名称遍历，避免误匹配其他数据中心的同名对象）。
+        查找虚拟机且名称为 UUID 格式时，先用 find_vm_by_uuid 查找
+        """
+        return self.find_objects_by_name({"obj": (name, vim_type)})["obj"]
+
+    def find_objects_by_name(
+        self,
+        lookups: Dict[str, Tuple[str, Any]]
+    ) -> Dict[str, Optional[object]]:
+        """
+        批量按名称查找对象
+
+        Args:
+            lookups: {键: (名称, vim 类型)}，名称规则同 find_object_by_name
+
+        Returns:
+            {键: 对象}，未找到的对象为 None
+
+        各类型的名称通过一次 RetrievePropertiesEx 请求（每个类型一个 FilterSpec）一并取回，
+        查找多个不同类型的对象时不需要逐个发起请求
+        """
+        found: Dict[str, Optional[object]] = {}
+        pending: Dict[str, Tuple[str, Any]] = {}
+        for key, (name, vim_type) in lookups.items():
+            if "/" in name:
+                obj = self.find_by_path(name)
+                found[key] = obj if isinstance(obj, vim_type) else None
+                continue
+            elif vim_type is vim.VirtualMachine and _UUID_RE.fullmatch(name):
+                obj = self.find_vm_by_uuid(name)
+                if obj is not None:
+                    found[key] = obj
+                    continue
+            found[key] = None
+            pending[key] = (name, vim_type)
 
-        container.Destroy()
-        return None
+        if not pending:
+            return found
+
+        content = self.get_content()
+        if not content:
+            return found
+
+        vim_types = list(dict.fromkeys(vim_type for _, vim_type in pending.values()))
+        rows = self._collect(content, [
+            self._filter_spec(content, vim_type, ["name"]) for vim_type in vim_types
+        ])
+        for key, (name, vim_type) in pending.items():
+            for obj, props in rows:
+                if isinstance(obj, vim_type) and props.get("name") == name:
+                    found[key] = obj
+                    break
+        return found
+
+    def _filter_spec(self, content, vim_type, path_set: List[str], objects: Optional[List[object]] = None):
+        """
+        构造 PropertyCollector 的 FilterSpec
+
+        指定 objects 时只查询这些对象，否则通过缓存的 ContainerView 查询该类型的全部对象
+        """
+        collector_types = vmodl.query.PropertyCollector
+        if objects is None:
+            traversal_spec = collector_types.TraversalSpec(
+                name="traverseEntities",
+                path="view",
+                skip=False,
+                type=vim.view.ContainerView
+            )
+            object_set = [collector_types.ObjectSpec(
+                obj=self._get_view(content, vim_type),
+                skip=True,
+                selectSet=[traversal_spec]
+            )]
+        else:
+            object_set = [collector_types.ObjectSpec(obj=obj, skip=False) for obj in objects]
+
+        prop_spec = collector_types.PropertySpec(
+            type=vim_type,
+            pathSet=path_set,
+            all=False
+        )
+        return collector_types.FilterSpec(
+            objectSet=object_set,
+            propSet=[prop_spec]
+        )
+
+    def _collect(self, content, filter_specs) -> List[Tuple[object, Dict[str, Any]]]:
+        """执行 RetrievePropertiesEx 并按 token 取完所有分页"""
+        collector = content.propertyCollector
+        result = collector.RetrievePropertiesEx(
+            filter_specs,
+            vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=_RETRIEVE_PAGE_SIZE)
+        )
+        rows = []
+        while result:
+            rows.extend(
+                (obj_content.obj, {prop.name: prop.val for prop in obj_content.propSet})
+                for obj_content in result.objects
+            )
+            if not result.token:
+                break
+            result = collector.ContinueRetrievePropertiesEx(result.token)
+        return rows
+
+    def _retrieve_properties(
+        self,
+        vim_type,
+        path_set: List[str],
+        objects: Optional[List[object]] = None
+    ) -> List[Tuple[object, Dict[str, Any]]]:
+        """
+        批量获取指定类型对象的属性
+
+        通过 PropertyCollector.RetrievePropertiesEx 按页取回 path_set 中的全部属性，
+        每页一次请求，避免逐个访问 vm.config / vm.runtime 等属性产生的 N×M 次 SOAP 往返。
+        指定 objects 时只查询这些对象，否则查询该类型的全部对象。
+
+        Returns:
+            (对象, {属性路径: 值}) 列表，未设置的属性不出现在字典中
+        """
+        content = self.get_content()
+        if not content or objects == []:
+            return []
+
+        return self._collect(content, [self._filter_spec(content, vim_type, path_set, objects)])
+
+    def _retrieve_names(self, vim_type) -> List[Tuple[str, object]]:
+        """批量获取指定类型所有对象的名称"""
+        return [
+            (props["name"], obj)
+            for obj, props in self._retrieve_properties(vim_type, ["name"])
+            if "name" in props
+        ]
+
+    def _name_map(self, vim_type) -> Dict[object, str]:
+        """获取指定类型所有对象到名称的映射"""
+        return {obj: name for name, obj in self._retrieve_names(vim_type)}
+
+    def _retrieve_many(self, requests: List[Tuple[Any, List[str]]]) -> List[List[Tuple[object, Dict[str, Any]]]]:
+        """
+        一次 RetrievePropertiesEx 请求取回多个类型的属性（每个类型一个 FilterSpec）
+
+        Args:
+            requests: [(vim 类型, 属性路径列表)]，类型之间不能有继承关系
+
+        Returns:
+            按 requests 顺序排列的 (对象, {属性路径: 值}) 列表
+        """
+        content = self.get_content()
+        if not content:
+            return [[] for _ in requests]
+
+        rows = self._collect(content, [
+            self._filter_spec(content, vim_type, path_set) for vim_type, path_set in requests
+        ])
+        return [
+            [(obj, props) for obj, props in rows if isinstance(obj, vim_type)]
+            for vim_type, _ in requests
+        ]
 
     def get_all_objects(self, vim_type):
         """获取所有指定类型的对象"""
@@ -114,88 +467,90 @@ class VSphereClient:
         if not content:
             return []
 
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim_type], True
-        )
-
-        objects = list(container.view)
-        container.Destroy()
-        return objects
+        return list(self._get_view(content, vim_type).view)
 
     # =========================================================================
     # 扩展的查询方法
     # =========================================================================
-    def get_templates(self, cluster_name: Optional[str] = None) -> List[VMTemplateInfo]:
-        """获取所有虚拟机模板"""
+    def get_templates(self, cluster_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取所有虚拟机模板，字段同 VMTemplateInfo"""
         templates = []
-        vms = self.get_all_objects(vim.VirtualMachine)
+        # 先只取 config.template 找出模板，再只对模板读取设备列表等较大的属性
+        template_vms = [
+            vm for vm, props in self._retrieve_properties(vim.VirtualMachine, ["config.template"])
+            if props.get("config.template")
+        ]
+        vms = self._retrieve_properties(vim.VirtualMachine, _TEMPLATE_PROPERTIES, template_vms)
+        hosts = {}
+        if cluster_name:
+            hosts = self._get_host_placement(*self._retrieve_many(_host_placement_requests()))
         
-        for vm in vms:
+        for vm, props in vms:
             try:
-                if not vm.config or not vm.config.template:
+                if not props.get("config.template"):
                     continue
                 
                 # 如果指定了集群，进行筛选
                 if cluster_name:
-                    vm_cluster = self._get_vm_cluster(vm)
-                    if vm_cluster and vm_cluster.name != cluster_name:
+                    _, vm_cluster_name = hosts.get(props.get("runtime.host"), (None, None))
+                    if vm_cluster_name and vm_cluster_name != cluster_name:
                         continue
                 
-                # 计算磁盘大小
-                disk_size_gb = 0
-                if vm.config.hardware and vm.config.hardware.device:
-                    for device in vm.config.hardware.device:
-                        if isinstance(device, vim.vm.device.VirtualDisk):
-                            disk_size_gb += device.capacityInKB // (1024 * 1024)
+                # 计算磁盘大小（每块磁盘按整 GB 向下取整后累加）
+                disk_size_gb = sum(
+                    device.capacityInKB >> 20
+                    for device in props.get("config.hardware.device") or ()
+                    if isinstance(device, vim.vm.device.VirtualDisk)
+                )
                 
-                templates.append(VMTemplateInfo(
-                    name=vm.name,
+                templates.append(_compact(
+                    name=props.get("name"),
                     template_id=vm._moId,
-                    guest_os=vm.config.guestFullName if vm.config else None,
-                    num_cpu=vm.config.hardware.numCPU if vm.config and vm.config.hardware else None,
-                    memory_mb=vm.config.hardware.memoryMB if vm.config and vm.config.hardware else None,
+                    guest_os=props.get("config.guestFullName"),
+                    num_cpu=props.get("config.hardware.numCPU"),
+                    memory_mb=props.get("config.hardware.memoryMB"),
                     disk_size_gb=disk_size_gb if disk_size_gb > 0 else None
                 ))
             except Exception as e:
-                logger.warning(f"获取模板 {vm.name} 信息失败: {e}")
+                logger.warning("获取模板 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return templates
 
-    def get_hosts(self, cluster_name: Optional[str] = None) -> List[HostInfo]:
-        """获取所有 ESXi 主机"""
+    def get_hosts(self, cluster_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取所有 ESXi 主机，字段同 HostInfo"""
         hosts = []
-        host_systems = self.get_all_objects(vim.HostSystem)
+        host_systems = self._retrieve_properties(vim.HostSystem, _HOST_PROPERTIES)
+        cluster_names = self._name_map(vim.ClusterComputeResource) if cluster_name else {}
         
-        for host in host_systems:
+        for host, props in host_systems:
             try:
                 # 如果指定了集群，进行筛选
                 if cluster_name:
-                    host_cluster = self._get_host_cluster(host)
-                    if host_cluster and host_cluster.name != cluster_name:
+                    host_cluster_name = cluster_names.get(props.get("parent"))
+                    if host_cluster_name and host_cluster_name != cluster_name:
                         continue
                 
                 # 计算资源使用情况
                 cpu_usage = None
                 memory_usage = None
-                total_cpu = None
                 total_memory_gb = None
                 
-                if host.summary and host.summary.hardware:
-                    hw = host.summary.hardware
-                    total_cpu = hw.numCpuCores
-                    total_memory_gb = hw.memorySize // (1024 ** 3)
+                total_cpu = props.get("summary.hardware.numCpuCores")
+                cpu_mhz = props.get("summary.hardware.cpuMhz")
+                memory_size = props.get("summary.hardware.memorySize")
+                if memory_size:
+                    total_memory_gb = memory_size // (1024 ** 3)
                 
-                if host.summary and host.summary.quickStats:
-                    stats = host.summary.quickStats
-                    if total_cpu and hw.cpuMhz:
-                        total_cpu_mhz = total_cpu * hw.cpuMhz
-                        cpu_usage = round((stats.overallCpuUsage / total_cpu_mhz) * 100, 1) if total_cpu_mhz > 0 else 0
-                    if host.summary.hardware.memorySize:
-                        memory_usage = round((stats.overallMemoryUsage * 1024 * 1024 / host.summary.hardware.memorySize) * 100, 1)
+                cpu_used = props.get("summary.quickStats.overallCpuUsage")
+                if total_cpu and cpu_mhz and cpu_used is not None:
+                    cpu_usage = round((cpu_used / (total_cpu * cpu_mhz)) * 100, 1)
+                memory_used = props.get("summary.quickStats.overallMemoryUsage")
+                if memory_size and memory_used is not None:
+                    memory_usage = round((memory_used * 1024 * 1024 / memory_size) * 100, 1)
                 
-                hosts.append(HostInfo(
-                    name=host.name,
+                hosts.append(_compact(
+                    name=props.get("name"),
                     host_id=host._moId,
                     cpu_usage=cpu_usage,
                     memory_usage=memory_usage,
@@ -203,109 +558,124 @@ class VSphereClient:
                     total_memory_gb=total_memory_gb
                 ))
             except Exception as e:
-                logger.warning(f"获取主机 {host.name} 信息失败: {e}")
+                logger.warning("获取主机 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return hosts
 
-    def get_clusters(self) -> List[ClusterInfo]:
-        """获取所有集群"""
+    def get_clusters(self) -> List[Dict[str, Any]]:
+        """获取所有集群，字段同 ClusterInfo"""
         clusters = []
-        cluster_objs = self.get_all_objects(vim.ClusterComputeResource)
+        cluster_objs = self._retrieve_properties(
+            vim.ClusterComputeResource, ["name", "host", "resourcePool"]
+        )
+        if not cluster_objs:
+            return clusters
+
+        # 资源池层级和模板标记在同一次批量查询中取回，虚拟机计数在本地完成
+        pool_rows, vm_rows = self._retrieve_many([
+            (vim.ResourcePool, ["vm", "resourcePool"]),
+            (vim.VirtualMachine, ["config.template"]),
+        ])
+        pools = dict(pool_rows)
+        template_vms = {vm for vm, props in vm_rows if props.get("config.template")}
         
-        for cluster in cluster_objs:
+        for cluster, props in cluster_objs:
             try:
-                num_hosts = len(cluster.host) if cluster.host else 0
+                num_hosts = len(props.get("host") or ())
                 
                 # 统计虚拟机数量
                 num_vms = 0
-                if cluster.resourcePool:
-                    num_vms = self._count_vms_in_resource_pool(cluster.resourcePool)
+                if props.get("resourcePool"):
+                    num_vms = self._count_vms_in_resource_pool(
+                        props["resourcePool"], pools, template_vms
+                    )
                 
-                clusters.append(ClusterInfo(
-                    name=cluster.name,
+                clusters.append(_compact(
+                    name=props.get("name"),
                     cluster_id=cluster._moId,
                     num_hosts=num_hosts,
                     num_vms=num_vms
                 ))
             except Exception as e:
-                logger.warning(f"获取集群 {cluster.name} 信息失败: {e}")
+                logger.warning("获取集群 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return clusters
 
-    def get_folders(self) -> List[FolderInfo]:
-        """获取所有 VM 文件夹"""
+    def get_folders(self) -> List[Dict[str, Any]]:
+        """获取所有 VM 文件夹，字段同 FolderInfo"""
         folders = []
-        folder_objs = self.get_all_objects(vim.Folder)
+        folder_rows, datacenter_rows = self._retrieve_many([
+            (vim.Folder, ["name", "parent", "childType"]),
+            (vim.Datacenter, ["name"]),
+        ])
+        folder_objs = dict(folder_rows)
+        datacenters = _names(datacenter_rows)
         
-        for folder in folder_objs:
+        for folder, props in folder_objs.items():
             try:
                 # 只返回 VM 文件夹（排除主机、网络、数据存储文件夹）
-                if not self._is_vm_folder(folder):
+                if not self._is_vm_folder(props):
                     continue
                 
-                path = self._get_folder_path(folder)
+                path = self._get_folder_path(folder, folder_objs, datacenters)
                 
-                folders.append(FolderInfo(
-                    name=folder.name,
+                folders.append(_compact(
+                    name=props.get("name"),
                     folder_id=folder._moId,
                     path=path
                 ))
             except Exception as e:
-                logger.warning(f"获取文件夹 {folder.name} 信息失败: {e}")
+                logger.warning("获取文件夹 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return folders
 
-    def get_resource_pools(self, cluster_name: Optional[str] = None) -> List[ResourcePoolInfo]:
-        """获取所有资源池"""
+    def get_resource_pools(self, cluster_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取所有资源池，字段同 ResourcePoolInfo"""
         pools = []
-        pool_objs = self.get_all_objects(vim.ResourcePool)
+        pool_objs = dict(self._retrieve_properties(vim.ResourcePool, _RESOURCE_POOL_PROPERTIES))
+        cluster_names = self._name_map(vim.ClusterComputeResource) if cluster_name else {}
         
-        for pool in pool_objs:
+        for pool, props in pool_objs.items():
             try:
                 # 如果指定了集群，进行筛选
                 if cluster_name:
-                    pool_cluster = self._get_resource_pool_cluster(pool)
-                    if pool_cluster and pool_cluster.name != cluster_name:
+                    pool_cluster_name = self._get_resource_pool_cluster(pool, pool_objs, cluster_names)
+                    if pool_cluster_name and pool_cluster_name != cluster_name:
                         continue
                 
                 cpu_limit = None
                 memory_limit_gb = None
                 
-                if pool.config and pool.config.cpuAllocation:
-                    limit = pool.config.cpuAllocation.limit
-                    if limit and limit > 0:
-                        cpu_limit = limit / 1000.0  # MHz to GHz
+                limit = props.get("config.cpuAllocation.limit")
+                if limit and limit > 0:
+                    cpu_limit = limit / 1000.0  # MHz to GHz
                 
-                if pool.config and pool.config.memoryAllocation:
-                    limit = pool.config.memoryAllocation.limit
-                    if limit and limit > 0:
-                        memory_limit_gb = limit / 1024.0  # MB to GB
+                limit = props.get("config.memoryAllocation.limit")
+                if limit and limit > 0:
+                    memory_limit_gb = limit / 1024.0  # MB to GB
                 
-                pools.append(ResourcePoolInfo(
-                    name=pool.name,
+                pools.append(_compact(
+                    name=props.get("name"),
                     resource_pool_id=pool._moId,
                     cpu_limit=cpu_limit,
                     memory_limit_gb=memory_limit_gb
                 ))
             except Exception as e:
-                logger.warning(f"获取资源池 {pool.name} 信息失败: {e}")
+                logger.warning("获取资源池 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return pools
 
-    def get_networks(self, cluster_name: Optional[str] = None) -> List[NetworkInfo]:
-        """获取所有网络"""
+    def get_networks(self, cluster_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取所有网络，字段同 NetworkInfo"""
         networks = []
-        network_objs = self.get_all_objects(vim.Network)
-        
-        # 添加 DistributedVirtualPortgroup 支持
-        dvs_pgs = self.get_all_objects(vim.dvs.DistributedVirtualPortgroup)
-        all_networks = list(network_objs) + list(dvs_pgs)
+        # DistributedVirtualPortgroup 是 Network 的子类型，按 Network 查询一次即同时包含分布式端口组
+        all_networks = self._retrieve_names(vim.Network)
         
-        for net in all_networks:
+        for name, net in all_networks:
             try:
                 # 简单过滤：如果提供了 cluster_name，这里暂时无法直接关联网络和集群
                 # vSphere 中网络通常跨集群，或者是数据中心级别的
@@ -315,82 +685,132 @@ class VSphereClient:
                 if isinstance(net, vim.dvs.DistributedVirtualPortgroup):
                     network_type = "Distributed"
                 
-                networks.append(NetworkInfo(
-                    name=net.name,
+                networks.append(_compact(
+                    name=name,
                     network_id=net._moId,
                     network_type=network_type
                 ))
             except Exception as e:
-                logger.warning(f"获取网络 {net.name} 信息失败: {e}")
+                logger.warning("获取网络 %s 信息失败: %s", name, e)
                 continue
         
         return networks
 
-    def get_virtual_machines(self, cluster_name: Optional[str] = None, vm_name_filter: Optional[str] = None) -> List[VMInfo]:
-        """获取所有虚拟机（非模板）"""
+    def get_virtual_machines(
+        self,
+        cluster_name: Optional[str] = None,
+        vm_name_filter: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        获取所有虚拟机（非模板），字段同 VMInfo
+
+        指定 fields 时只读取并返回这些字段（name 和 vm_id 总是返回），
+        不需要的属性（如设备列表）和关联查询（主机、网络、文件夹）都会省去
+        """
         vms_info = []
-        vms = self.get_all_objects(vim.VirtualMachine)
+        if fields:
+            wanted = set(fields)
+            path_set = ["name", "config.template"]
+            for field in fields:
+                path_set += _VM_FIELD_PROPERTIES.get(field, ())
+            if cluster_name:
+                path_set.append("runtime.host")
+            path_set = list(dict.fromkeys(path_set))
+        else:
+            wanted = None
+            path_set = _VM_PROPERTIES
+
+        if vm_name_filter and "/" in vm_name_filter:
+            # 清单路径由 SearchIndex 在服务端直接定位，不需要遍历全部虚拟机名称
+            vm = self.find_by_path(vm_name_filter)
+            matched = [vm] if isinstance(vm, vim.VirtualMachine) else []
+            vms = self._retrieve_properties(vim.VirtualMachine, path_set, matched)
+        elif vm_name_filter:
+            # 名称筛选先通过一次批量查询完成，只对匹配的虚拟机读取详细属性
+            needle = vm_name_filter.lower()
+            matched = [
+                obj for name, obj in self._retrieve_names(vim.VirtualMachine)
+                if needle in name.lower()
+            ]
+            vms = self._retrieve_properties(vim.VirtualMachine, path_set, matched)
+        else:
+            vms = self._retrieve_properties(vim.VirtualMachine, path_set)
+
+        # 跳过模板
+        vms = [(vm, props) for vm, props in vms if not props.get("config.template")]
+        if not vms:
+            return vms_info
+
+        # 主机/集群、网络名称和文件夹路径在同一次批量查询中取回，之后在本地关联；
+        # 只查询返回字段或集群筛选实际需要的部分
+        need_hosts = "runtime.host" in path_set
+        need_networks = "network" in path_set
+        need_folders = "parent" in path_set
+        requests = []
+        if need_hosts:
+            requests += _host_placement_requests()
+        if need_networks:
+            requests.append((vim.Network, ["name"]))
+        if need_folders:
+            requests += [(vim.Folder, ["name", "parent"]), (vim.Datacenter, ["name"])]
+        rows = iter(self._retrieve_many(requests)) if requests else iter(())
+
+        hosts = self._get_host_placement(next(rows), next(rows)) if need_hosts else {}
+        network_names = _names(next(rows)) if need_networks else {}
+        folder_objs = dict(next(rows)) if need_folders else {}
+        datacenters = _names(next(rows)) if need_folders else {}
+        folder_paths: Dict[object, str] = {}
         
-        for vm in vms:
+        for vm, props in vms:
             try:
-                # 跳过模板
-                if vm.config and vm.config.template:
-                    continue
-                
-                # 名称筛选
-                if vm_name_filter and vm_name_filter.lower() not in vm.name.lower():
-                    continue
-                
                 # 集群筛选
-                vm_cluster = self._get_vm_cluster(vm)
-                if cluster_name and vm_cluster and vm_cluster.name != cluster_name:
+                host_name, vm_cluster_name = hosts.get(props.get("runtime.host"), (None, None))
+                if cluster_name and vm_cluster_name and vm_cluster_name != cluster_name:
                     continue
                 
-                # 获取主机名
-                host_name = None
-                if vm.runtime and vm.runtime.host:
-                    host_name = vm.runtime.host.name
-                
-                # 获取 Guest Info
-                guest_hostname = None
-                ip_address = None
-                networks = []
-                if vm.guest:
-                    guest_hostname = vm.guest.hostName
-                    ip_address = vm.guest.ipAddress
-                
-                if vm.network:
-                    networks = [net.name for net in vm.network]
+                networks = [
+                    network_names[net] for net in props.get("network") or ()
+                    if net in network_names
+                ]
 
                 # 计算总磁盘大小
                 total_disk_gb = 0.0
-                if vm.config and vm.config.hardware:
-                    for device in vm.config.hardware.device:
-                        if isinstance(device, vim.vm.device.VirtualDisk):
-                            total_disk_gb += device.capacityInKB / (1024 * 1024)
+                for device in props.get("config.hardware.device") or ():
+                    if isinstance(device, vim.vm.device.VirtualDisk):
+                        total_disk_gb += device.capacityInKB / (1024 * 1024)
                 
-                # 获取文件夹路径
+                # 获取文件夹路径（同一文件夹下的虚拟机共用计算结果）
                 folder_path = None
-                if vm.parent:
-                    folder_path = self._get_folder_path(vm.parent)
+                parent = props.get("parent")
+                if parent in folder_paths:
+                    folder_path = folder_paths[parent]
+                elif parent in folder_objs:
+                    folder_path = self._get_folder_path(parent, folder_objs, datacenters)
+                    folder_paths[parent] = folder_path
                 
-                vms_info.append(VMInfo(
-                    name=vm.name,
+                power_state = props.get("runtime.powerState")
+                info = _compact(
+                    name=props.get("name"),
                     vm_id=vm._moId,
-                    power_state=str(vm.runtime.powerState) if vm.runtime else None,
-                    guest_os=vm.config.guestFullName if vm.config else None,
-                    num_cpu=vm.config.hardware.numCPU if vm.config and vm.config.hardware else None,
-                    memory_mb=vm.config.hardware.memoryMB if vm.config and vm.config.hardware else None,
+                    power_state=str(power_state) if power_state is not None else None,
+                    guest_os=props.get("config.guestFullName"),
+                    num_cpu=props.get("config.hardware.numCPU"),
+                    memory_mb=props.get("config.hardware.memoryMB"),
                     host_name=host_name,
-                    cluster_name=vm_cluster.name if vm_cluster else None,
+                    cluster_name=vm_cluster_name,
                     folder_path=folder_path,
-                    guest_hostname=guest_hostname,
-                    ip_address=ip_address,
+                    guest_hostname=props.get("guest.hostName"),
+                    ip_address=props.get("guest.ipAddress"),
                     total_disk_gb=round(total_disk_gb, 2) if total_disk_gb > 0 else None,
-                    networks=networks
-                ))
+                    networks=networks if need_networks else None
+                )
+                if wanted is not None:
+                    # 集群筛选额外读取的主机信息不出现在结果中
+                    info = {k: v for k, v in info.items() if k in wanted or k in ("name", "vm_id")}
+                vms_info.append(info)
             except Exception as e:
-                logger.warning(f"获取虚拟机 {vm.name} 信息失败: {e}")
+                logger.warning("获取虚拟机 %s 信息失败: %s", props.get("name"), e)
                 continue
         
         return vms_info
@@ -416,58 +836,83 @@ class VSphereClient:
     ) -> Tuple[Optional[str], Optional[MCPError]]:
         """从模板克隆虚拟机"""
         try:
+            # 模板、集群、资源池和文件夹通过一次批量请求查找
+            lookups = {
+                "template": (template_name, vim.VirtualMachine),
+                "cluster": (cluster_name, vim.ClusterComputeResource),
+            }
+            if resource_pool_name:
+                lookups["resource_pool"] = (resource_pool_name, vim.ResourcePool)
+            if folder_name:
+                lookups["folder"] = (folder_name, vim.Folder)
+            found = self.find_objects_by_name(lookups)
+
             # 查找模板
-            template = self.find_object_by_name(template_name, vim.VirtualMachine)
+            template = found["template"]
             if not template:
-                return None, MCPError(
+                return None, MCPError.model_construct(
                     error_type=ErrorType.RESOURCE_NOT_FOUND,
                     parameter="template_name",
                     message=f"模板 '{template_name}' 不存在",
                     suggestion="请使用 describeTemplates 查询可用模板",
-                    related_tools=[TOOL_DESCRIBE_TEMPLATES]
+                    related_tools=_RELATED_TEMPLATES
                 )
             
             # 查找集群
-            cluster = self.find_object_by_name(cluster_name, vim.ClusterComputeResource)
+            cluster = found["cluster"]
             if not cluster:
-                return None, MCPError(
+                return None, MCPError.model_construct(
                     error_type=ErrorType.RESOURCE_NOT_FOUND,
                     parameter="cluster_name",
                     message=f"集群 '{cluster_name}' 不存在",
                     suggestion="请使用 describeClusters 查询可用集群",
-                    related_tools=[TOOL_DESCRIBE_CLUSTERS]
+                    related_tools=_RELATED_CLUSTERS
                 )
             
             # 确定资源池
             resource_pool = None
             if resource_pool_name:
-                resource_pool = self.find_object_by_name(resource_pool_name, vim.ResourcePool)
+                resource_pool = found["resource_pool"]
                 if not resource_pool:
-                    return None, MCPError(
+                    return None, MCPError.model_construct(
                         error_type=ErrorType.RESOURCE_NOT_FOUND,
                         parameter="resource_pool_name",
                         message=f"资源池 '{resource_pool_name}' 不存在",
                         suggestion="请使用 describeResourcePools 查询可用资源池",
-                        related_tools=[TOOL_DESCRIBE_RESOURCE_POOLS]
+                        related_tools=_RELATED_RESOURCE_POOLS
                     )
             else:
                 resource_pool = cluster.resourcePool
             
+            # 克隆需要的模板属性（所在文件夹、设备列表、客户机类型）按需一次取回
+            customize = any([ip_address, hostname, password, domain])
+            template_paths = []
+            if not folder_name:
+                template_paths.append("parent")
+            if network_name:
+                template_paths.append("config.hardware.device")
+            if customize:
+                template_paths.append("config.guestId")
+            template_props: Dict[str, Any] = {}
+            if template_paths:
+                rows = self._retrieve_properties(vim.VirtualMachine, template_paths, [template])
+                template_props = rows[0][1] if rows else {}
+
             # 确定目标文件夹
             folder = None
             if folder_name:
-                folder = self.find_object_by_name(folder_name, vim.Folder)
+                folder = found["folder"]
                 if not folder:
-                    return None, MCPError(
+                    return None, MCPError.model_construct(
                         error_type=ErrorType.RESOURCE_NOT_FOUND,
                         parameter="folder_name",
                         message=f"文件夹 '{folder_name}' 不存在",
                         suggestion="请使用 describeFolders 查询可用文件夹",
-                        related_tools=[TOOL_DESCRIBE_FOLDERS]
+                        related_tools=_RELATED_FOLDERS
                     )
             else:
                 # 使用模板所在的文件夹
-                folder = template.parent
+                folder = template_props.get("parent")
             
             # 创建克隆规格
             relocate_spec = vim.vm.RelocateSpec()
@@ -493,17 +938,19 @@ class VSphereClient:
 
             # 配置网络连接 (Device Change)
             if network_name:
-                network_spec = self._create_network_spec(template, network_name)
+                network_spec = self._create_network_spec(
+                    template_props.get("config.hardware.device") or (), network_name
+                )
                 if network_spec:
                     device_changes.append(network_spec)
                     config_changes = True
                 else:
-                    return None, MCPError(
+                    return None, MCPError.model_construct(
                         error_type=ErrorType.RESOURCE_NOT_FOUND,
                         parameter="network_name",
                         message=f"网络 '{network_name}' 不存在或配置失败",
                         suggestion="请使用 describeNetworks 查询可用网络",
-                        related_tools=[TOOL_DESCRIBE_NETWORKS]
+                        related_tools=_RELATED_NETWORKS
                     )
             
             if config_changes:
@@ -512,9 +959,9 @@ class VSphereClient:
                 clone_spec.config = config_spec
             
             # 客户机自定义 (Customization Spec)
-            if any([ip_address, hostname, password, domain]):
+            if customize:
                 # Guest OS Detection
-                is_windows = "win" in template.config.guestId.lower()
+                is_windows = "win" in (template_props.get("config.guestId") or "").lower()
                 
                 customization_spec = self._create_customization_spec(
                     is_windows=is_windows,
@@ -650,9 +1097,49 @@ class VSphereClient:
             
             return str(vm.runtime.powerState), None
         except Exception as e:
-            logger.error(f"Error getting power state for VM '{vm_name}': {e}")
+            logger.error("Error getting power state for VM '%s': %s", vm_name, e)
             return None, parse_vsphere_error(e, "get_vm_power_state")
 
+    def get_task_info(self, task_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[MCPError]]:
+        """
+        查询 clone_vm / reconfigure_vm 返回的任务状态
+
+        task_id 为 "task-<moId>" 格式，这里直接按 moId 构造 Task 引用，
+        读取一次 info 即可，不需要遍历清单。vCenter 只保留最近完成的任务，
+        过期的任务按资源不存在返回
+        """
+        if not self.is_connected():
+            return None, MCPError(error_type=ErrorType.CONNECTION_ERROR, message="Not connected to vSphere", suggestion="Please connect first")
+
+        # clone_vm / reconfigure_vm 在 moId（如 task-123）前加了 "task-" 前缀；
+        # 去掉后不再是 moId 格式说明调用方直接传了 moId
+        mo_id = task_id.removeprefix("task-")
+        if "-" not in mo_id:
+            mo_id = task_id
+
+        try:
+            info = vim.Task(mo_id, self._connection._stub).info
+            return _compact(
+                task_id=task_id,
+                state=str(info.state),
+                progress=info.progress,
+                entity_name=info.entityName,
+                description_id=info.descriptionId,
+                start_time=info.startTime.isoformat() if info.startTime else None,
+                complete_time=info.completeTime.isoformat() if info.completeTime else None,
+                error=info.error.localizedMessage if info.error else None
+            ), None
+        except vmodl.fault.ManagedObjectNotFound:
+            return None, MCPError(
+                error_type=ErrorType.RESOURCE_NOT_FOUND,
+                parameter="task_id",
+                message=f"Task '{task_id}' not found",
+                suggestion="Check the task_id returned by createVMFromTemplate/reconfigureVM; completed tasks expire after a few minutes"
+            )
+        except Exception as e:
+            logger.error("Error getting task '%s': %s", task_id, e)
+            return None, parse_vsphere_error(e, "get_task_info")
+
     def reconfigure_vm(
         self,
         vm_name: str,
@@ -684,11 +1171,19 @@ class VSphereClient:
             if not vm:
                 return None, MCPError(error_type=ErrorType.RESOURCE_NOT_FOUND, message=f"Virtual machine '{vm_name}' not found", suggestion="Check VM name")
 
+            # 电源状态和设备列表一次请求取回，磁盘和网卡查找共用同一份设备列表
+            rows = self._retrieve_properties(
+                vim.VirtualMachine, ["runtime.powerState", "config.hardware.device"], [vm]
+            )
+            props = rows[0][1] if rows else {}
+            devices = props.get("config.hardware.device") or ()
+
             # 2. 检查电源状态 (必须关机)
-            if vm.runtime.powerState != vim.VirtualMachine.PowerState.poweredOff:
+            power_state = props.get("runtime.powerState")
+            if power_state != vim.VirtualMachine.PowerState.poweredOff:
                 return None, MCPError(
                     error_type=ErrorType.PRECONDITION_FAILED, 
-                    message=f"VM '{vm_name}' is currently {vm.runtime.powerState}. It must be powered off to reconfigure.",
+                    message=f"VM '{vm_name}' is currently {power_state}. It must be powered off to reconfigure.",
                     suggestion="Please power off the VM first. You can use 'getVMPowerState' to check the status."
                 )
 
@@ -716,66 +1211,38 @@ class VSphereClient:
                     return None, MCPError(error_type=ErrorType.INVALID_PARAMETER, message="Disk size must be positive", suggestion="Provide a value > 0")
                 
                 # 找到第一个磁盘
-                disk = None
-                for device in vm.config.hardware.device:
-                    if isinstance(device, vim.vm.device.VirtualDisk):
-                        disk = device
-                        break
+                disk = next((d for d in devices if isinstance(d, vim.vm.device.VirtualDisk)), None)
                 
                 if not disk:
                      return None, MCPError(error_type=ErrorType.RESOURCE_NOT_FOUND, message="No virtual disk found on VM to expand", suggestion="Check VM configuration")
                 
-                current_size_gb = disk.capacityInKB / (1024 * 1024)
-                if disk_size_gb < current_size_gb:
+                # 以 KB 整数比较，避免浮点误差
+                requested_kb = int(disk_size_gb * 1024 * 1024)
+                if requested_kb < disk.capacityInKB:
+                    current_size_gb = disk.capacityInKB / (1024 * 1024)
                     return None, MCPError(
                         error_type=ErrorType.INVALID_PARAMETER, 
                         message=f"Cannot shrink disk (Current: {current_size_gb} GB, Requested: {disk_size_gb} GB). Only expansion is supported.",
                         suggestion="Provide a size larger than current disk size"
                     )
-                elif disk_size_gb > current_size_gb:
+                elif requested_kb > disk.capacityInKB:
                     disk_spec = vim.vm.device.VirtualDeviceSpec()
                     disk_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.edit
                     disk_spec.device = disk
-                    disk_spec.device.capacityInKB = int(disk_size_gb * 1024 * 1024)
+                    disk_spec.device.capacityInKB = requested_kb
                     device_changes.append(disk_spec)
                     changed = True
 
             # Network Change
             if network_name:
                 # 找到第一块网卡
-                nic = None
-                for device in vm.config.hardware.device:
-                    if isinstance(device, vim.vm.device.VirtualEthernetCard):
-                        nic = device
-                        break
+                nic = next((d for d in devices if isinstance(d, vim.vm.device.VirtualEthernetCard)), None)
                 
                 if not nic:
                     return None, MCPError(error_type=ErrorType.RESOURCE_NOT_FOUND, message="No network adapter found on VM to reconfigure", suggestion="Check VM configuration")
 
-                # 复用 _create_network_spec 的逻辑来查找网络并构建 BackingInfo
-                # 注意：这里我们临时传入 vm 作为 template 参数，因为 _create_network_spec 只需要 helper 功能
-                # 或者我们可以重构 _create_network_spec，但为了简单，我们直接在这里实现查找网络的逻辑
-                
                 # 查找网络
-                target_network = None
-                content = self.get_content()
-                
-                # 尝试标准网络
-                container = content.viewManager.CreateContainerView(content.rootFolder, [vim.Network], True)
-                for net in container.view:
-                    if net.name == network_name:
-                        target_network = net
-                        break
-                container.Destroy()
-                
-                # 尝试分布式端口组
-                if not target_network:
-                    container = content.viewManager.CreateContainerView(content.rootFolder, [vim.dvs.DistributedVirtualPortgroup], True)
-                    for pg in container.view:
-                        if pg.name == network_name:
-                            target_network = pg
-                            break
-                    container.Destroy()
+                target_network = self._find_network(network_name)
 
                 if not target_network:
                     return None, MCPError(
@@ -816,45 +1283,35 @@ class VSphereClient:
             return f"task-{task._moId}", None
 
         except Exception as e:
-            logger.error(f"Error reconfiguring VM '{vm_name}': {e}")
+            logger.error("Error reconfiguring VM '%s': %s", vm_name, e)
             return None, parse_vsphere_error(e, "reconfigure_vm")
 
     # =========================================================================
     # 辅助方法
     # =========================================================================
 
-    def _create_network_spec(self, template, network_name: str) -> Optional[vim.vm.device.VirtualDeviceSpec]:
-        """创建网络配置规格"""
+    def _find_network(self, network_name: str):
+        """
+        按名称查找网络，同名时标准网络优先，其次分布式端口组
+
+        DistributedVirtualPortgroup 是 Network 的子类型，按 Network 查询一次名称即可同时取回两者
+        """
+        if "/" in network_name:
+            return self.find_object_by_name(network_name, vim.Network)
+
+        matches = [net for name, net in self._retrieve_names(vim.Network) if name == network_name]
+        standard = (net for net in matches if not isinstance(net, vim.dvs.DistributedVirtualPortgroup))
+        return next(standard, None) or next(iter(matches), None)
+
+    def _create_network_spec(self, devices, network_name: str) -> Optional[vim.vm.device.VirtualDeviceSpec]:
+        """创建网络配置规格（devices 为模板的 config.hardware.device 列表）"""
         # 1. 查找目标网络对象
-        content = self.get_content()
-        network = None
-        # 尝试查找标准网络
-        container = content.viewManager.CreateContainerView(content.rootFolder, [vim.Network], True)
-        for net in container.view:
-            if net.name == network_name:
-                network = net
-                break
-        container.Destroy()
-        
-        # 如果不是标准网络，尝试查找分布式端口组
-        if not network:
-            container = content.viewManager.CreateContainerView(content.rootFolder, [vim.dvs.DistributedVirtualPortgroup], True)
-            for pg in container.view:
-                if pg.name == network_name:
-                    network = pg
-                    break
-            container.Destroy()
-            
+        network = self._find_network(network_name)
         if not network:
             return None
 
         # 2. 找到模板中的第一个网卡
-        nic = None
-        for device in template.config.hardware.device:
-            if isinstance(device, vim.vm.device.VirtualEthernetCard):
-                nic = device
-                break
-        
+        nic = next((d for d in devices if isinstance(d, vim.vm.device.VirtualEthernetCard)), None)
         if not nic:
             return None # 模板没有网卡，无法修改
 
@@ -886,74 +1343,59 @@ class VSphereClient:
         
         return nic_spec
 
-    def _get_vm_cluster(self, vm):
-        """获取虚拟机所在的集群"""
-        try:
-            if vm.runtime and vm.runtime.host:
-                host = vm.runtime.host
-                if host.parent and isinstance(host.parent, vim.ClusterComputeResource):
-                    return host.parent
-        except Exception:
-            pass
-        return None
-
-    def _get_host_cluster(self, host):
-        """获取主机所在的集群"""
-        try:
-            if host.parent and isinstance(host.parent, vim.ClusterComputeResource):
-                return host.parent
-        except Exception:
-            pass
-        return None
-
-    def _get_resource_pool_cluster(self, pool):
-        """获取资源池所在的集群"""
-        try:
-            parent = pool.parent
-            while parent:
-                if isinstance(parent, vim.ClusterComputeResource):
-                    return parent
-                parent = getattr(parent, 'parent', None)
-        except Exception:
-            pass
-        return None
-
-    def _count_vms_in_resource_pool(self, pool) -> int:
-        """统计资源池中的虚拟机数量"""
+    def _get_host_placement(self, host_rows, cluster_rows) -> Dict[object, Tuple[Optional[str], Optional[str]]]:
+        """
+        获取每台主机的 (主机名, 所在集群名)，独立主机的集群名为 None
+
+        host_rows / cluster_rows 为 _host_placement_requests() 的查询结果
+        """
+        cluster_names = _names(cluster_rows)
+        return {
+            host: (props.get("name"), cluster_names.get(props.get("parent")))
+            for host, props in host_rows
+        }
+
+    def _get_resource_pool_cluster(self, pool, pools, cluster_names) -> Optional[str]:
+        """获取资源池所在集群的名称（pools 为资源池到属性的映射，需包含 parent）"""
+        parent = pools[pool].get("parent")
+        while parent in pools:
+            parent = pools[parent].get("parent")
+        return cluster_names.get(parent)
+
+    def _count_vms_in_resource_pool(self, pool, pools, template_vms) -> int:
+        """统计资源池中的虚拟机数量（pools 为资源池到 vm/resourcePool 属性的映射）"""
         count = 0
-        try:
-            if pool.vm:
-                count += len([vm for vm in pool.vm if not (vm.config and vm.config.template)])
-            if pool.resourcePool:
-                for child_pool in pool.resourcePool:
-                    count += self._count_vms_in_resource_pool(child_pool)
-        except Exception:
-            pass
+        # 用显式栈遍历子资源池，层级再深也不会触及递归深度上限
+        stack = [pool]
+        while stack:
+            props = pools.get(stack.pop())
+            if not props:
+                continue
+            count += sum(1 for vm in props.get("vm") or () if vm not in template_vms)
+            stack.extend(props.get("resourcePool") or ())
         return count
 
-    def _is_vm_folder(self, folder) -> bool:
+    def _is_vm_folder(self, props) -> bool:
         """检查文件夹是否是 VM 文件夹"""
-        try:
-            # 检查文件夹类型
-            if hasattr(folder, 'childType') and folder.childType:
-                return 'VirtualMachine' in folder.childType
-        except Exception:
-            pass
-        return False
-
-    def _get_folder_path(self, folder) -> str:
-        """获取文件夹的完整路径"""
+        return 'VirtualMachine' in (props.get("childType") or ())
+
+    def _get_folder_path(self, folder, folders, datacenters) -> str:
+        """
+        获取文件夹的完整路径
+
+        folders 为文件夹到 name/parent 属性的映射，datacenters 为数据中心到名称的映射
+        """
         path_parts = []
         current = folder
-        try:
-            while current and hasattr(current, 'name'):
-                if isinstance(current, vim.Datacenter):
-                    path_parts.append(current.name)
-                    break
-                path_parts.append(current.name)
-                current = getattr(current, 'parent', None)
-        except Exception:
-            pass
+        while current is not None:
+            if current in datacenters:
+                path_parts.append(datacenters[current])
+                break
+            props = folders.get(current)
+            if not props or "name" not in props:
+                break
+            path_parts.append(props["name"])
+            current = props.get("parent")
         
         path_parts.reverse()
         return "/" + "/".join(path_parts) if path_parts else "/"
@@ -963,31 +1405,96 @@ class VSphereClient:
 # 全局客户端管理
 # =============================================================================
 _vsphere_client: Optional[VSphereClient] = None
+# 工具调用在线程池中并发执行，保证同一时间只建立一个连接
+_client_lock = threading.Lock()
 
 
 def get_vsphere_client() -> Tuple[Optional[VSphereClient], Optional[MCPError]]:
     """获取全局 vSphere 客户端，自动处理连接"""
     global _vsphere_client
     
-    # 检查环境变量
-    host = os.getenv("VSPHERE_HOST")
-    username = os.getenv("VSPHERE_USERNAME")
-    password = os.getenv("VSPHERE_PASSWORD")
-    port = int(os.getenv("VSPHERE_PORT", "443"))
+    # 检查连接配置
+    config = load_config()
+    host = config.vsphere_host
+    username = config.vsphere_username
+    password = config.vsphere_password
+    port = config.vsphere_port
     
     if not host or not username or not password:
-            return None, MCPError(
-                error_type=ErrorType.MISSING_PARAMETER,
-                message="vSphere 连接配置不完整",
-                suggestion="请设置环境变量: VSPHERE_HOST, VSPHERE_USERNAME, VSPHERE_PASSWORD"
-            )
+        return None, _ERR_MISSING_CONFIG
     
+    # 会话可能已在服务端过期（如 vCenter 重启或被管理员注销），
+    # 超过检查间隔时先确认一次，避免把请求发到失效的会话上
+    client = _vsphere_client
+    if client is not None and client.is_connected() and not client.session_valid(_SESSION_CHECK_INTERVAL):
+        _discard_client(client)
+        client = None
+
     # 如果客户端不存在或连接已断开，重新连接
-    if _vsphere_client is None or not _vsphere_client.is_connected():
-        _vsphere_client = VSphereClient(host, username, password, port)
-        error = _vsphere_client.connect()
-        if error:
-            _vsphere_client = None
-            return None, error
+    if client is None or not client.is_connected():
+        with _client_lock:
+            client = _vsphere_client
+            if client is None or not client.is_connected():
+                client = VSphereClient(host, username, password, port, config.http_timeout)
+                error = client.connect()
+                if error:
+                    return None, error
+                _vsphere_client = client
     
-    return _vsphere_client, None
+    return client, None
+
+
+async def acquire_vsphere_client() -> Tuple[Optional[VSphereClient], Optional[MCPError]]:
+    """
+    异步获取全局 vSphere 客户端
+
+    客户端已连接且会话最近确认过时直接返回，不占用线程池和并发名额；
+    否则在线程池中执行 get_vsphere_client（可能需要连接或检查会话）
+    """
+    client = _vsphere_client
+    if client is not None and client.is_connected() and client.session_fresh(_SESSION_CHECK_INTERVAL):
+        return client, None
+    return await run_blocking(get_vsphere_client)
+
+
+def _discard_client(client: VSphereClient) -> None:
+    """
+    丢弃会话已失效的客户端，下次调用 get_vsphere_client 时重新连接
+
+    只清除全局引用，不调用 disconnect：其他工作线程可能仍持有该客户端，
+    会话由服务端自行过期
+    """
+    global _vsphere_client
+
+    logger.info("vSphere 会话已失效，将在下次请求时重新连接")
+    with _client_lock:
+        if _vsphere_client is client:
+            _vsphere_client = None
+
+
+def keepalive_vsphere_client() -> None:
+    """保持全局客户端的会话活跃；会话失效时丢弃客户端，下次调用 get_vsphere_client 重新连接"""
+    client = _vsphere_client
+    if client is None or not client.is_connected():
+        return
+
+    if not client.keepalive():
+        _discard_client(client)
+
+
+def close_vsphere_client() -> None:
+    """断开并释放全局客户端"""
+    global _vsphere_client
+
+    client, _vsphere_client = _vsphere_client, None
+    if client is not None:
+        try:
+            client.disconnect()
+        except Exception as e:
+            logger.warning("断开 vSphere 连接失败: %s", e)
+
+
+def reset_vsphere_client() -> None:
+    """断开全局客户端并清除缓存的连接配置（如更换凭据后），下次调用时重新读取环境变量"""
+    close_vsphere_client()
+    load_config.cache_clear()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+vSphere MCP Server - 配置模块
+
+集中读取环境变量，启动时构建一次，避免在各处重复调用 os.getenv
+"""
+
+import os
+import logging
+import functools
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# describe* 缓存时间的环境变量前缀，完整名称为 VSPHERE_CACHE_TTL_<NAME>
+_CACHE_TTL_PREFIX = "VSPHERE_CACHE_TTL_"
+
+
+def _parse_max_inflight(default: int = 8) -> int:
+    """读取并发上限，环境变量 VSPHERE_MAX_INFLIGHT"""
+    value = os.getenv("VSPHERE_MAX_INFLIGHT")
+    if value is None:
+        return default
+
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning("环境变量 VSPHERE_MAX_INFLIGHT 无效: %s，使用默认值 %s", value, default)
+        return default
+
+
+def _parse_keepalive_interval(default: float = 1200.0) -> float:
+    """读取会话保活间隔（秒），环境变量 VSPHERE_KEEPALIVE_INTERVAL；<= 0 表示不保活"""
+    value = os.getenv("VSPHERE_KEEPALIVE_INTERVAL")
+    if value is None:
+        return default
+
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("环境变量 VSPHERE_KEEPALIVE_INTERVAL 无效: %s，使用默认值 %s", value, default)
+        return default
+
+
+def _parse_http_timeout() -> Optional[float]:
+    """读取 SOAP 请求超时（秒），环境变量 VSPHERE_HTTP_TIMEOUT；未设置或 <= 0 表示不超时"""
+    value = os.getenv("VSPHERE_HTTP_TIMEOUT")
+    if not value:
+        return None
+
+    try:
+        timeout = float(value)
+    except ValueError:
+        logger.warning("环境变量 VSPHERE_HTTP_TIMEOUT 无效: %s，不设置超时", value)
+        return None
+    return timeout if timeout > 0 else None
+
+
+def _parse_cache_ttls() -> Mapping[str, float]:
+    """读取所有 VSPHERE_CACHE_TTL_<NAME> 环境变量，无效值忽略（使用工具默认值）"""
+    ttls = {}
+    for env_name, value in os.environ.items():
+        if not env_name.startswith(_CACHE_TTL_PREFIX):
+            continue
+        try:
+            ttls[env_name[len(_CACHE_TTL_PREFIX):]] = float(value)
+        except ValueError:
+            logger.warning("环境变量 %s 无效: %s，使用默认值", env_name, value)
+    return MappingProxyType(ttls)
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """服务器配置"""
+    vsphere_host: Optional[str]
+    vsphere_username: Optional[str]
+    vsphere_password: Optional[str]
+    vsphere_port: int
+    server_host: str
+    server_port: int
+    log_level: str
+    transport: str
+    use_uvloop: bool
+    keepalive_interval: float
+    http_timeout: Optional[float]
+    max_inflight: int
+    cache_ttls: Mapping[str, float]
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """从环境变量构建配置"""
+        return cls(
+            vsphere_host=os.getenv("VSPHERE_HOST"),
+            vsphere_username=os.getenv("VSPHERE_USERNAME"),
+            vsphere_password=os.getenv("VSPHERE_PASSWORD"),
+            vsphere_port=int(os.getenv("VSPHERE_PORT", "443")),
+            server_host=os.getenv("SERVER_HOST", "0.0.0.0"),
+            server_port=int(os.getenv("SERVER_PORT", "8000")),
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            transport=os.getenv("SERVER_TRANSPORT", "stdio"),
+            use_uvloop=os.getenv("VSPHERE_MCP_USE_UVLOOP", "1") != "0",
+            keepalive_interval=_parse_keepalive_interval(),
+            http_timeout=_parse_http_timeout(),
+            max_inflight=_parse_max_inflight(),
+            cache_ttls=_parse_cache_ttls(),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> Config:
+    """进程内共享的配置，只读取一次环境变量（load_config.cache_clear() 后重新读取）"""
+    return Config.from_env()
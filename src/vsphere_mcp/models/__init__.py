@@ -13,6 +13,7 @@ from .base import (
 
 from .vsphere import (
     VMInfo,
+    VMField,
     VMTemplateInfo,
     HostInfo,
     ClusterInfo,
@@ -30,6 +31,7 @@ __all__ = [
     "MCPResult",
     # vSphere 模型
     "VMInfo",
+    "VMField",
     "VMTemplateInfo",
     "HostInfo",
     "ClusterInfo",
@@ -7,7 +7,7 @@ MCP 最佳实践：
 - 统一响应模型
 """
 
-from enum import Enum
+from enum import StrEnum
 from typing import Dict, Any, Optional, List
 
 from pydantic import Field, BaseModel, ConfigDict
@@ -16,7 +16,7 @@ from pydantic import Field, BaseModel, ConfigDict
 # =============================================================================
 # 错误类型枚举
 # =============================================================================
-class ErrorType(str, Enum):
+class ErrorType(StrEnum):
     """错误类型枚举，帮助 LLM 理解错误性质"""
     MISSING_PARAMETER = "MISSING_PARAMETER"          # 必需参数缺失
     INVALID_PARAMETER = "INVALID_PARAMETER"          # 参数格式或值无效
@@ -33,7 +33,20 @@ class ErrorType(str, Enum):
 # 基础模型
 # =============================================================================
 class MyBaseModel(BaseModel):
-    model_config = ConfigDict(json_dumps_params={'ensure_ascii': False})
+    """
+    模型基类
+
+    - frozen：所有模型都是构造后不再修改的值对象，可安全地作为模块级常量共享
+    - defer_build：校验/序列化 schema 推迟到首次使用时构建，减少导入耗时
+      （*Info 模型仅作为文档 schema，通常不会被构建）
+    - pydantic v2 的 JSON 序列化由 pydantic-core 完成，直接输出 UTF-8，
+      中文不会被转义（v1 的 json_dumps_params 在 v2 中无效，已移除）
+    """
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    def to_json(self) -> bytes:
+        """序列化为 JSON（省略空字段），直接调用 pydantic-core 序列化器"""
+        return self.__pydantic_serializer__.to_json(self, by_alias=True, exclude_none=True)
 
 
 class ToolSuggestion(MyBaseModel):
@@ -64,14 +77,15 @@ class MCPError(MyBaseModel):
 
     def __str__(self) -> str:
         """格式化输出，便于 LLM 解析"""
-        parts = [
-            f"[{self.error_type.value}] {self.message}",
-            f"建议: {self.suggestion}"
-        ]
-        if self.related_tools:
-            tools_info = ", ".join([f"{t.tool_name}({t.description})" for t in self.related_tools])
-            parts.append(f"相关工具: {tools_info}")
-        return "\n".join(parts)
+        head = f"[{self.error_type}] {self.message}\n建议: {self.suggestion}"
+        if not self.related_tools:
+            return head
+        if len(self.related_tools) == 1:
+            t = self.related_tools[0]
+            tools_info = f"{t.tool_name}({t.description})"
+        else:
+            tools_info = ", ".join(f"{t.tool_name}({t.description})" for t in self.related_tools)
+        return f"{head}\n相关工具: {tools_info}"
 
 
 class MCPResult(MyBaseModel):
@@ -3,7 +3,7 @@
 vSphere MCP Server - vSphere 业务数据模型
 """
 
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from pydantic import Field
 
@@ -30,6 +30,13 @@ class VMInfo(MyBaseModel):
     networks: Optional[List[str]] = Field(description="连接的网络", default=None)
 
 
+# describeVMs 可按需返回的 VMInfo 字段（name 和 vm_id 总是返回）
+VMField = Literal[
+    "power_state", "guest_os", "num_cpu", "memory_mb", "host_name", "cluster_name",
+    "folder_path", "guest_hostname", "ip_address", "total_disk_gb", "networks",
+]
+
+
 class VMTemplateInfo(MyBaseModel):
     """虚拟机模板信息"""
     name: Optional[str] = Field(description="模板名称", default=None)
@@ -4,20 +4,23 @@ vSphere MCP Server - 服务器入口模块
 
 MCP 服务器的主入口，包含：
 - ToolRegistry：工具注册类
-- lifespan：生命周期管理
-- mcp：FastMCP 实例
-- run_server：服务器运行函数
+- get_mcp：FastMCP 实例（按需创建，也可通过模块属性 mcp 访问）
+- run_server：服务器运行函数（进程级的会话保活和连接清理）
 """
 
-import os
+from __future__ import annotations
+
 import sys
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+import dataclasses
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Optional
 
-from mcp.server.fastmcp import FastMCP
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
 
-from .client import PYVMOMI_AVAILABLE
+from .config import Config, load_config
+from .client import PYVMOMI_AVAILABLE, keepalive_vsphere_client, close_vsphere_client
 from .tools import (
     describe_templates,
     describe_hosts,
@@ -26,21 +29,51 @@ from .tools import (
     describe_resource_pools,
     describe_networks,
     describe_vms,
+    describe_create_vm_options,
     create_vm_from_template,
     reconfigure_vm,
     get_vm_power_state,
+    get_vm_task,
 )
 
 
-# 配置日志
-logging.basicConfig(
-    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
-    format='[%(asctime)s] %(levelname)-8s %(message)s             %(filename)s:%(lineno)d',
-    datefmt='%y/%m/%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
 
+# 工具注册表：(函数, 工具名称, 描述, annotations, structured_output)
+# describe* 工具自行返回序列化好的 JSON 文本，以非结构化输出注册
+_QUERY_TOOLS = (
+    (describe_templates, "describeTemplates", "查询可用的虚拟机模板列表",
+     {"title": "查询虚拟机模板", "readOnlyHint": True}, False),
+    (describe_hosts, "describeHosts", "查询可用的 ESXi 主机列表",
+     {"title": "查询主机", "readOnlyHint": True}, False),
+    (describe_clusters, "describeClusters", "查询可用的集群列表",
+     {"title": "查询集群", "readOnlyHint": True}, False),
+    (describe_folders, "describeFolders", "查询可用的虚拟机文件夹列表",
+     {"title": "查询文件夹", "readOnlyHint": True}, False),
+    (describe_resource_pools, "describeResourcePools", "查询可用的资源池列表",
+     {"title": "查询资源池", "readOnlyHint": True}, False),
+    (describe_networks, "describeNetworks", "查询可用的网络列表",
+     {"title": "查询网络", "readOnlyHint": True}, False),
+    (describe_vms, "describeVMs", "查询虚拟机列表 (支持按名称或集群筛选)",
+     {"title": "查询虚拟机", "readOnlyHint": True}, False),
+    (describe_create_vm_options, "describeVMCreateOptions",
+     "一次查询创建虚拟机所需的模板、集群、文件夹、资源池和网络 (并发查询，替代逐个调用 describe*)",
+     {"title": "查询创建虚拟机选项", "readOnlyHint": True}, False),
+    (get_vm_power_state, "getVMPowerState", "查询虚拟机电源状态 (用于检查是否可配置)",
+     {"title": "查询电源状态", "readOnlyHint": True}, None),
+    (get_vm_task, "getVMTask", "查询虚拟机任务状态和进度 (createVMFromTemplate/reconfigureVM 提交后轮询)",
+     {"title": "查询任务状态", "readOnlyHint": True}, None),
+)
+
+_LIFECYCLE_TOOLS = (
+    (create_vm_from_template, "createVMFromTemplate", "从模板创建虚拟机 (支持自定义 CPU、内存、网络)",
+     {"title": "创建虚拟机 (从模板)", "readOnlyHint": False, "destructiveHint": False}, None),
+    (reconfigure_vm, "reconfigureVM", "重新配置虚拟机 (支持 CPU/内存/磁盘扩容/网络变更)",
+     {"title": "重新配置虚拟机", "readOnlyHint": False, "destructiveHint": False}, None),
+)
+
+
 class ToolRegistry:
     """工具注册中心 - 负责将工具函数注册到 MCP 服务器"""
 
@@ -54,121 +87,164 @@ class ToolRegistry:
         logger.info("所有工具注册完成")
         return self.mcp
 
+    def _register(self, tools) -> None:
+        """按注册表注册工具"""
+        for func, name, description, annotations, structured_output in tools:
+            self.mcp.tool(
+                name=name,
+                description=description,
+                annotations=annotations,
+                structured_output=structured_output
+            )(func)
+
     def _register_query_tools(self):
         """注册查询类工具"""
-        self.mcp.tool(
-            name="describeTemplates",
-            description="查询可用的虚拟机模板列表",
-            annotations={"title": "查询虚拟机模板", "readOnlyHint": True}
-        )(describe_templates)
-
-        self.mcp.tool(
-            name="describeHosts",
-            description="查询可用的 ESXi 主机列表",
-            annotations={"title": "查询主机", "readOnlyHint": True}
-        )(describe_hosts)
-
-        self.mcp.tool(
-            name="describeClusters",
-            description="查询可用的集群列表",
-            annotations={"title": "查询集群", "readOnlyHint": True}
-        )(describe_clusters)
-
-        self.mcp.tool(
-            name="describeFolders",
-            description="查询可用的虚拟机文件夹列表",
-            annotations={"title": "查询文件夹", "readOnlyHint": True}
-        )(describe_folders)
-
-        self.mcp.tool(
-            name="describeResourcePools",
-            description="查询可用的资源池列表",
-            annotations={"title": "查询资源池", "readOnlyHint": True}
-        )(describe_resource_pools)
-        
-        self.mcp.tool(
-            name="describeNetworks",
-            description="查询可用的网络列表",
-            annotations={"title": "查询网络", "readOnlyHint": True}
-        )(describe_networks)
-
-        self.mcp.tool(
-            name="describeVMs",
-            description="查询虚拟机列表 (支持按名称或集群筛选)",
-            annotations={"title": "查询虚拟机", "readOnlyHint": True}
-        )(describe_vms)
-
-        self.mcp.tool(
-            name="getVMPowerState",
-            description="查询虚拟机电源状态 (用于检查是否可配置)",
-            annotations={"title": "查询电源状态", "readOnlyHint": True}
-        )(get_vm_power_state)
+        self._register(_QUERY_TOOLS)
 
     def _register_lifecycle_tools(self):
         """注册生命周期管理工具"""
-        self.mcp.tool(
-            name="createVMFromTemplate",
-            description="从模板创建虚拟机 (支持自定义 CPU、内存、网络)",
-            annotations={"title": "创建虚拟机 (从模板)", "readOnlyHint": False, "destructiveHint": False}
-        )(create_vm_from_template)
-
-        self.mcp.tool(
-            name="reconfigureVM",
-            description="重新配置虚拟机 (支持 CPU/内存/磁盘扩容/网络变更)",
-            annotations={"title": "重新配置虚拟机", "readOnlyHint": False, "destructiveHint": False}
-        )(reconfigure_vm)
-
-
-@asynccontextmanager
-async def lifespan(server: FastMCP) -> AsyncGenerator[None, None]:
-    """MCP Server 生命周期管理"""
-    logger.info("初始化 vSphere MCP Server...")
+        self._register(_LIFECYCLE_TOOLS)
 
-    # 检查依赖
-    if not PYVMOMI_AVAILABLE:
-        logger.error("错误: 未安装 pyvmomi 库。请运行 'pip install pyvmomi'")
-    
-    # 在启动时打印配置通过
-    host = os.getenv("VSPHERE_HOST")
-    logger.info(f"vSphere 配置: {host if host else '未设置 (将在首次调用时检查)'}")
 
-    # 注册工具
-    registry = ToolRegistry(server)
-    registry.register_tools()
+async def _keepalive_loop(interval: float) -> None:
+    """定期刷新 vSphere 会话，避免长时间空闲后首个请求才发现会话过期"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(keepalive_vsphere_client)
+        except Exception as e:
+            logger.warning("vSphere 会话保活失败: %s", e)
 
-    yield
 
-    logger.info("关闭 vSphere MCP Server...")
+async def _serve(mcp: FastMCP, config: Config) -> None:
+    """
+    运行 MCP 服务，并管理进程内共享的 vSphere 客户端
 
+    FastMCP 的 lifespan 每个连接进入/退出一次（SSE 每个客户端一次），
+    会话保活和断开连接必须放在这里，整个进程只做一次
+    """
+    logger.info("初始化 vSphere MCP Server...")
 
-# 创建 MCP 服务器实例
-mcp = FastMCP(
-    "vSphere VM Manager",
-    lifespan=lifespan,
-    dependencies=["pyvmomi", "pydantic"]
-)
+    # 检查依赖
+    if not PYVMOMI_AVAILABLE:
+        logger.error("错误: 未安装 pyvmomi 库。请运行 'pip install pyvmomi'")
+
+    # 在启动时打印配置通过
+    host = config.vsphere_host
+    logger.info("vSphere 配置: %s", host if host else '未设置 (将在首次调用时检查)')
+
+    keepalive_task = None
+    if config.keepalive_interval > 0:
+        keepalive_task = asyncio.create_task(_keepalive_loop(config.keepalive_interval))
+
+    try:
+        if config.transport == "sse":
+            await mcp.run_sse_async()
+        else:
+            await mcp.run_stdio_async()
+    finally:
+        logger.info("关闭 vSphere MCP Server...")
+        if keepalive_task is not None:
+            keepalive_task.cancel()
+        # 注销会话是一次阻塞的 SOAP 请求，不在事件循环线程中执行
+        await asyncio.to_thread(close_vsphere_client)
+
+
+def _configure_logging(level: str) -> None:
+    """
+    配置根日志（在启动服务时调用，而不是在导入本模块时）
+
+    根 logger 已有 handler 时（如宿主程序或测试已配置日志）保持不变
+    """
+    if logging.getLogger().handlers:
+        return
+    logging.basicConfig(
+        level=level.upper(),
+        format='[%(asctime)s] %(levelname)-8s %(message)s             %(filename)s:%(lineno)d',
+        datefmt='%y/%m/%d %H:%M:%S'
+    )
+
+
+# MCP 服务器实例，首次使用时创建（避免导入本模块即加载 mcp 框架）
+_mcp: Optional[FastMCP] = None
+
+
+def get_mcp(config: Optional[Config] = None) -> FastMCP:
+    """
+    获取 MCP 服务器实例，首次调用时按 config（默认读取环境变量）创建并注册工具
+
+    实例创建后再传入的 config 不生效；需要覆盖监听地址和端口时修改 mcp.settings
+    """
+    global _mcp
+    if _mcp is None:
+        from mcp.server.fastmcp import FastMCP
+
+        config = config or load_config()
+        _configure_logging(config.log_level)
+        mcp = FastMCP(
+            "vSphere VM Manager",
+            dependencies=["pyvmomi", "pydantic"],
+            host=config.server_host,
+            port=config.server_port
+        )
+        ToolRegistry(mcp).register_tools()
+        _mcp = mcp
+    return _mcp
+
+
+def __getattr__(name: str) -> Any:
+    """兼容 `from vsphere_mcp.server import mcp`（如 mcp dev 入口）"""
+    if name == "mcp":
+        return get_mcp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _uvloop_runner() -> Optional[Callable[[Coroutine[Any, Any, None]], None]]:
+    """返回 uvloop.run（可选依赖，未安装时返回 None，使用默认 asyncio 循环）"""
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug("未安装 uvloop，使用默认事件循环")
+        return None
+
+    logger.info("已启用 uvloop 事件循环")
+    return uvloop.run
 
 
 def run_server():
     """运行服务器"""
     import argparse
     
+    config = load_config()
+    _configure_logging(config.log_level)
+
     parser = argparse.ArgumentParser(description="vSphere MCP Server")
-    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")), help="SSE 传输模式的端口")
-    parser.add_argument("--transport", type=str, default=os.getenv("SERVER_TRANSPORT", "stdio"), choices=["stdio", "sse"], help="传输模式 (stdio/sse)")
+    parser.add_argument("--host", type=str, default=config.server_host, help="SSE 传输模式的监听地址")
+    parser.add_argument("--port", type=int, default=config.server_port, help="SSE 传输模式的端口")
+    parser.add_argument("--transport", type=str, default=config.transport, choices=["stdio", "sse"], help="传输模式 (stdio/sse)")
     
     args = parser.parse_args()
+    config = dataclasses.replace(
+        config, server_host=args.host, server_port=args.port, transport=args.transport
+    )
     
-    logger.info(f"启动 vSphere MCP 服务器，日志级别: {logging.getLevelName(logger.getEffectiveLevel())}")
+    logger.info("启动 vSphere MCP 服务器，日志级别: %s", logging.getLevelName(logger.getEffectiveLevel()))
     
     # 根据传输模式运行
-    transport = args.transport
-    logger.info(f"使用传输协议: {transport}")
-    
-    if transport == "sse":
-        mcp.run(transport="sse", port=args.port, host=os.getenv("SERVER_HOST", "0.0.0.0"))
-    else:
-        mcp.run(transport="stdio")
+    transport = config.transport
+    logger.info("使用传输协议: %s", transport)
+
+    # stdio 模式按行读写，uvloop 收益很小，只在网络传输时启用
+    runner = asyncio.run
+    if transport != "stdio" and config.use_uvloop:
+        runner = _uvloop_runner() or asyncio.run
+
+    # 实例可能已在解析命令行之前创建（如 dev_server.py 导入 mcp），
+    # 此时 config 不会再被使用，命令行指定的监听地址和端口直接写入实例设置
+    mcp = get_mcp(config)
+    mcp.settings.host = config.server_host
+    mcp.settings.port = config.server_port
+    runner(_serve(mcp, config))
 
 
 if __name__ == "__main__":
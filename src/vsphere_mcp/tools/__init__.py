@@ -11,7 +11,9 @@ from .query import (
     describe_resource_pools,
     describe_networks,
     describe_vms,
+    describe_create_vm_options,
     get_vm_power_state,
+    get_vm_task,
 )
 
 from .lifecycle import (
@@ -28,7 +30,9 @@ __all__ = [
     "describe_resource_pools",
     "describe_networks",
     "describe_vms",
+    "describe_create_vm_options",
     "get_vm_power_state",
+    "get_vm_task",
     # 生命周期工具
     "create_vm_from_template",
     "reconfigure_vm",
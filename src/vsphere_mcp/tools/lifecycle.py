@@ -4,41 +4,76 @@ vSphere MCP Server - 生命周期管理工具
 """
 
 import logging
-from typing import Optional
+from typing import Annotated, Any, Dict, Optional
 
 from pydantic import Field
 
-from ..models import MCPResult
-from ..client import get_vsphere_client
+from ..models import ErrorType, MCPError, MCPResult
+from ..client import acquire_vsphere_client
 from ..utils import (
     validate_vm_name,
     validate_template_name,
     validate_cluster_name,
     validate_network_name,
     validate_cpu_memory,
+    response_cache,
+    run_blocking,
 )
 
 
 logger = logging.getLogger(__name__)
 
 
+# create_vm_from_template 的参数校验表：(参数名, 校验函数)，按顺序检查
+_VM_CREATE_VALIDATORS = (
+    ("vm_name", validate_vm_name),
+    ("template_name", validate_template_name),
+    ("cluster_name", validate_cluster_name),
+    ("network_name", validate_network_name),
+)
+
+
+# 提交 vCenter 任务后，describe* 缓存只短时间缓存结果的时长（秒）；
+# 任务完成前查询到的仍是旧清单，不能按完整 TTL 缓存
+_TASK_SETTLE_SECONDS = 300.0
+
+
+# reconfigure_vm 未指定任何变更时的固定响应
+_ERR_NO_CHANGES = MCPResult.model_construct(
+    success=False,
+    error=MCPError.model_construct(
+        error_type=ErrorType.MISSING_PARAMETER,
+        message="未指定任何配置变更",
+        suggestion="请至少指定一项: cpu, memory_mb, disk_size_gb 或 network_name"
+    )
+)
+
+
+def _first_create_error(args: Dict[str, Any]) -> Optional[MCPError]:
+    """按顺序校验创建参数，返回第一个错误"""
+    for name, validator in _VM_CREATE_VALIDATORS:
+        if error := validator(args.get(name)):
+            return error
+    return validate_cpu_memory(args.get("cpu"), args.get("memory_mb"))
+
+
 async def create_vm_from_template(
-    vm_name: str = Field(description="虚拟机名称"),
-    template_name: str = Field(description="模板名称"),
-    cluster_name: str = Field(description="集群名称"),
-    cpu: Optional[int] = Field(default=None, description="CPU 核数，覆盖模板设置"),
-    memory_mb: Optional[int] = Field(default=None, description="内存大小 (MB)，覆盖模板设置"),
-    network_name: Optional[str] = Field(default=None, description="网络名称，覆盖模板默认网络"),
-    folder_name: Optional[str] = Field(default=None, description="文件夹名称"),
-    resource_pool_name: Optional[str] = Field(default=None, description="资源池名称"),
+    vm_name: Annotated[str, Field(description="虚拟机名称")],
+    template_name: Annotated[str, Field(description="模板名称，也可传清单路径如 '/Datacenter/vm/Templates/ubuntu-template'")],
+    cluster_name: Annotated[str, Field(description="集群名称")],
+    cpu: Annotated[Optional[int], Field(description="CPU 核数，覆盖模板设置")] = None,
+    memory_mb: Annotated[Optional[int], Field(description="内存大小 (MB)，覆盖模板设置")] = None,
+    network_name: Annotated[Optional[str], Field(description="网络名称，覆盖模板默认网络")] = None,
+    folder_name: Annotated[Optional[str], Field(description="文件夹名称或清单路径 (describeFolders 返回的 path)")] = None,
+    resource_pool_name: Annotated[Optional[str], Field(description="资源池名称")] = None,
     # Advanced Customization
-    ip_address: Optional[str] = Field(default=None, description="静态 IP 地址 (不填则默认 DHCP)"),
-    subnet_mask: Optional[str] = Field(default=None, description="子网掩码 (默认 255.255.255.0)"),
-    gateway: Optional[str] = Field(default=None, description="默认网关"),
-    dns_servers: Optional[list[str]] = Field(default=None, description="DNS 服务器列表"),
-    hostname: Optional[str] = Field(default=None, description="主机名 (不填则使用虚拟机名称)"),
-    password: Optional[str] = Field(default=None, description="操作系统管理员/Root 密码"),
-    domain: Optional[str] = Field(default=None, description="域名 (Linux) 或加入的域 (Windows)")
+    ip_address: Annotated[Optional[str], Field(description="静态 IP 地址 (不填则默认 DHCP)")] = None,
+    subnet_mask: Annotated[Optional[str], Field(description="子网掩码 (默认 255.255.255.0)")] = None,
+    gateway: Annotated[Optional[str], Field(description="默认网关")] = None,
+    dns_servers: Annotated[Optional[list[str]], Field(description="DNS 服务器列表")] = None,
+    hostname: Annotated[Optional[str], Field(description="主机名 (不填则使用虚拟机名称)")] = None,
+    password: Annotated[Optional[str], Field(description="操作系统管理员/Root 密码")] = None,
+    domain: Annotated[Optional[str], Field(description="域名 (Linux) 或加入的域 (Windows)")] = None
 ) -> MCPResult:
     """
     从模板创建虚拟机 (支持自定义 CPU、内存、网络及 Guest OS 配置)
@@ -47,35 +82,34 @@ async def create_vm_from_template(
     1. 虚拟机名称 (vm_name) - 必须唯一
     2. 模板名称 (template_name) - 可通过 describeTemplates 查询
     3. 集群名称 (cluster_name) - 可通过 describeClusters 查询
+
+    已知清单路径时（如 describeFolders 的 path 加上模板名），template_name / folder_name
+    可直接传路径，服务端按路径定位，比按名称遍历更快。
     
     高级自定义 (Guest Customization):
     - 如果提供 `ip_address`，则配置静态 IP (推荐同时提供 subnet/gateway)。
     - 如果提供 `password`，将设置为系统管理员/Root 密码。
     - 自定义过程发生在首次启动时，可能需要几分钟。
     """
-    # 参数验证链
-    if error := validate_vm_name(vm_name):
-        return MCPResult(success=False, error=error)
-
-    if error := validate_template_name(template_name):
-        return MCPResult(success=False, error=error)
-
-    if error := validate_cluster_name(cluster_name):
-        return MCPResult(success=False, error=error)
-        
-    if error := validate_network_name(network_name):
-        return MCPResult(success=False, error=error)
-
-    if error := validate_cpu_memory(cpu, memory_mb):
-        return MCPResult(success=False, error=error)
+    # 参数验证
+    if error := _first_create_error({
+        "vm_name": vm_name,
+        "template_name": template_name,
+        "cluster_name": cluster_name,
+        "network_name": network_name,
+        "cpu": cpu,
+        "memory_mb": memory_mb
+    }):
+        return MCPResult.model_construct(success=False, error=error)
 
     # 获取 vSphere 客户端
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     # 执行克隆
-    task_id, error = client.clone_vm(
+    task_id, error = await run_blocking(
+        client.clone_vm,
         template_name=template_name,
         vm_name=vm_name,
         cluster_name=cluster_name,
@@ -95,44 +129,42 @@ async def create_vm_from_template(
     )
     
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
+
+    # 清单即将变化（任务仍在执行），丢弃 describe* 缓存并在任务期间只短时间缓存
+    response_cache.clear(settle=_TASK_SETTLE_SECONDS)
     
-    result_data = {
-        "vm_name": vm_name,
-        "status": "creation_started",
-        "message": f"虚拟机 '{vm_name}' 创建请求已提交",
-        "task_id": task_id,
-        "details": {
-            "template": template_name,
-            "cluster": cluster_name,
-            "cpu": cpu,
-            "memory_mb": memory_mb,
-            "folder": folder_name,
-            "resource_pool": resource_pool_name
-        }
+    details = {
+        "template": template_name,
+        "cluster": cluster_name,
+        "cpu": cpu,
+        "memory_mb": memory_mb,
+        "folder": folder_name,
+        "resource_pool": resource_pool_name,
+        **({"network": network_name} if network_name else {}),
+        **({"customization": "enabled"} if ip_address or hostname or password else {}),
+        **({"ip": ip_address} if ip_address else {}),
     }
-    
-    if network_name:
-        result_data["details"]["network"] = network_name
-    
-    if any([ip_address, hostname, password]):
-        result_data["details"]["customization"] = "enabled"
-        if ip_address:
-             result_data["details"]["ip"] = ip_address
-    
-    return MCPResult(
+
+    return MCPResult.model_construct(
         success=True,
-        data=result_data,
+        data={
+            "vm_name": vm_name,
+            "status": "creation_started",
+            "message": f"虚拟机 '{vm_name}' 创建请求已提交",
+            "task_id": task_id,
+            "details": details
+        },
         request_id=task_id
     )
 
 
 async def reconfigure_vm(
-    vm_name: str = Field(description="虚拟机名称"),
-    cpu: Optional[int] = Field(default=None, description="新的 CPU 核数"),
-    memory_mb: Optional[int] = Field(default=None, description="新的内存大小 (MB)"),
-    disk_size_gb: Optional[int] = Field(default=None, description="新的磁盘大小 (GB)，仅允许扩容"),
-    network_name: Optional[str] = Field(default=None, description="新的网络名称 (修改第一块网卡)")
+    vm_name: Annotated[str, Field(description="虚拟机名称")],
+    cpu: Annotated[Optional[int], Field(description="新的 CPU 核数")] = None,
+    memory_mb: Annotated[Optional[int], Field(description="新的内存大小 (MB)")] = None,
+    disk_size_gb: Annotated[Optional[int], Field(description="新的磁盘大小 (GB)，仅允许扩容")] = None,
+    network_name: Annotated[Optional[str], Field(description="新的网络名称 (修改第一块网卡)")] = None
 ) -> MCPResult:
     """
     重新配置虚拟机 (修改 CPU/内存/磁盘/网络)
@@ -142,25 +174,21 @@ async def reconfigure_vm(
     2. 磁盘仅支持 **扩容** (Increase Size)，不支持缩容。
     3. 至少指定一项配置变更。
     """
-    # 参数验证
-    pass  # Pydantic has validated types, logical validation below
-
-    if all(arg is None for arg in [cpu, memory_mb, disk_size_gb, network_name]):
-        return MCPResult(
-            success=False, 
-            error="Please specify at least one configuration to change: cpu, memory_mb, disk_size_gb, or network_name"
-        )
+    # 参数验证（类型已由 FastMCP 校验）
+    if cpu is None and memory_mb is None and disk_size_gb is None and network_name is None:
+        return _ERR_NO_CHANGES
 
     if error := validate_cpu_memory(cpu, memory_mb):
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
 
     # 获取客户端
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
 
     # 执行重新配置
-    task_id, error = client.reconfigure_vm(
+    task_id, error = await run_blocking(
+        client.reconfigure_vm,
         vm_name=vm_name,
         cpu=cpu,
         memory_mb=memory_mb,
@@ -169,27 +197,22 @@ async def reconfigure_vm(
     )
 
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
 
-    result_data = {
-        "vm_name": vm_name,
-        "status": "reconfiguration_started",
-        "message": f"虚拟机 '{vm_name}' 配置更新请求已提交",
-        "task_id": task_id,
-        "details": {}
-    }
+    # 虚拟机配置即将变化（任务仍在执行），丢弃 describe* 缓存并在任务期间只短时间缓存
+    response_cache.clear(settle=_TASK_SETTLE_SECONDS)
 
-    if cpu:
-        result_data["details"]["cpu"] = cpu
-    if memory_mb:
-        result_data["details"]["memory_mb"] = memory_mb
-    if disk_size_gb:
-        result_data["details"]["disk_size_gb"] = disk_size_gb
-    if network_name:
-        result_data["details"]["network_name"] = network_name
+    # 只列出本次实际变更的项
+    changes = (("cpu", cpu), ("memory_mb", memory_mb), ("disk_size_gb", disk_size_gb), ("network_name", network_name))
 
-    return MCPResult(
+    return MCPResult.model_construct(
         success=True,
-        data=result_data,
+        data={
+            "vm_name": vm_name,
+            "status": "reconfiguration_started",
+            "message": f"虚拟机 '{vm_name}' 配置更新请求已提交",
+            "task_id": task_id,
+            "details": {name: value for name, value in changes if value}
+        },
         request_id=task_id
     )
@@ -3,145 +3,278 @@
 vSphere MCP Server - 查询类工具
 """
 
+import asyncio
+import inspect
 import logging
-from typing import Optional
+import functools
+from typing import Annotated, Dict, Hashable, Optional
 
 from pydantic import Field
 
-from ..models import MCPResult
-from ..client import get_vsphere_client
-from ..utils import parse_vsphere_error
+from ..models import MCPResult, VMField
+from ..client import acquire_vsphere_client
+from ..utils import parse_vsphere_error, response_cache, make_cache_key, get_cache_ttl, run_blocking
 
 
 logger = logging.getLogger(__name__)
 
 
+# 空列表结果的共享响应（MCPResult 不可变）
+_EMPTY_OK = MCPResult.model_construct(success=True, data=[])
+
+
+def _ok(data) -> MCPResult:
+    """构造成功响应；data 由服务端生成，无需再次校验"""
+    if isinstance(data, list) and not data:
+        return _EMPTY_OK
+    return MCPResult.model_construct(success=True, data=data)
+
+
+def _respond(result: MCPResult) -> str:
+    """
+    直接返回序列化好的 JSON 文本
+
+    describe* 工具以非结构化输出注册，FastMCP 直接把字符串包装为 TextContent，
+    不会再对返回值做一次 model_validate + 编码；返回 str 也避免本模块导入 mcp 包
+    """
+    return result.to_json().decode()
+
+
+# 正在执行的 describe* 查询：相同参数的并发调用共享同一个任务，只查询一次 vSphere
+_inflight: Dict[Hashable, "asyncio.Task[str]"] = {}
+
+
+async def _single_flight(key: Hashable, factory) -> str:
+    """合并相同 key 的并发调用；调用方被取消时不影响共享任务"""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+# describe* 工具统一追加的参数：跳过缓存
+_REFRESH_PARAMETER = inspect.Parameter(
+    "refresh",
+    inspect.Parameter.KEYWORD_ONLY,
+    default=False,
+    annotation=Annotated[bool, Field(description="是否跳过缓存，直接查询 vSphere")]
+)
+
+
+def _describe_tool(cache_name: str, default_ttl: float):
+    """
+    describe* 工具的公共包装：TTL 缓存 + 并发合并 + 预序列化响应
+
+    被包装函数返回 MCPResult；只有成功的响应会被缓存，
+    缓存时间取 Config.cache_ttls[cache_name]（环境变量 VSPHERE_CACHE_TTL_<cache_name>，0 表示不缓存）。
+    包装后的工具多一个 refresh 参数，为 True 时跳过缓存并用新结果覆盖缓存
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(refresh: bool = False, **kwargs) -> str:
+            key = make_cache_key(func.__name__, kwargs)
+            if not refresh:
+                cached = response_cache.get(key)
+                if cached is not None:
+                    return cached
+
+            async def fetch() -> str:
+                result = await func(**kwargs)
+                response = _respond(result)
+                if result.success:
+                    response_cache.set(key, response, get_cache_ttl(cache_name, default_ttl))
+                return response
+
+            return await _single_flight(key, fetch)
+
+        # FastMCP 按签名生成参数 schema，这里在原函数参数后追加 refresh
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), _REFRESH_PARAMETER],
+            return_annotation=str
+        )
+        return wrapper
+    return decorator
+
+
+@_describe_tool("TEMPLATES", default_ttl=300)
 async def describe_templates(
-    cluster_name: Optional[str] = Field(default=None, description="集群名称，用于筛选")
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选")] = None
 ) -> MCPResult:
     """查询可用的虚拟机模板列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        templates = client.get_templates(cluster_name)
-        return MCPResult(success=True, data=templates)
+        templates = await run_blocking(client.get_templates, cluster_name)
+        return _ok(templates)
     except Exception as e:
-        logger.error(f"查询模板列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_templates"))
+        logger.error("查询模板列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_templates"))
 
 
+@_describe_tool("HOSTS", default_ttl=30)
 async def describe_hosts(
-    cluster_name: Optional[str] = Field(default=None, description="集群名称，用于筛选")
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选")] = None
 ) -> MCPResult:
     """查询可用的主机列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        hosts = client.get_hosts(cluster_name)
-        return MCPResult(success=True, data=hosts)
+        hosts = await run_blocking(client.get_hosts, cluster_name)
+        return _ok(hosts)
     except Exception as e:
-        logger.error(f"查询主机列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_hosts"))
+        logger.error("查询主机列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_hosts"))
 
 
+@_describe_tool("CLUSTERS", default_ttl=60)
 async def describe_clusters() -> MCPResult:
     """查询可用的集群列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        clusters = client.get_clusters()
-        return MCPResult(success=True, data=clusters)
+        clusters = await run_blocking(client.get_clusters)
+        return _ok(clusters)
     except Exception as e:
-        logger.error(f"查询集群列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_clusters"))
+        logger.error("查询集群列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_clusters"))
 
 
+@_describe_tool("FOLDERS", default_ttl=60)
 async def describe_folders() -> MCPResult:
     """查询可用的文件夹列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        folders = client.get_folders()
-        return MCPResult(success=True, data=folders)
+        folders = await run_blocking(client.get_folders)
+        return _ok(folders)
     except Exception as e:
-        logger.error(f"查询文件夹列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_folders"))
+        logger.error("查询文件夹列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_folders"))
 
 
+@_describe_tool("RESOURCE_POOLS", default_ttl=60)
 async def describe_resource_pools(
-    cluster_name: Optional[str] = Field(default=None, description="集群名称，用于筛选")
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选")] = None
 ) -> MCPResult:
     """查询可用的资源池列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        pools = client.get_resource_pools(cluster_name)
-        return MCPResult(success=True, data=pools)
+        pools = await run_blocking(client.get_resource_pools, cluster_name)
+        return _ok(pools)
     except Exception as e:
-        logger.error(f"查询资源池列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_resource_pools"))
+        logger.error("查询资源池列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_resource_pools"))
 
 
+@_describe_tool("NETWORKS", default_ttl=60)
 async def describe_networks(
-    cluster_name: Optional[str] = Field(default=None, description="集群名称，用于筛选（注：网络通常跨集群，筛选仅供参考）")
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选（注：网络通常跨集群，筛选仅供参考）")] = None
 ) -> MCPResult:
     """查询可用的网络列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        networks = client.get_networks(cluster_name)
-        return MCPResult(success=True, data=networks)
+        networks = await run_blocking(client.get_networks, cluster_name)
+        return _ok(networks)
     except Exception as e:
-        logger.error(f"查询网络列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_networks"))
+        logger.error("查询网络列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_networks"))
 
 
+@_describe_tool("VMS", default_ttl=10)
 async def describe_vms(
-    cluster_name: Optional[str] = Field(default=None, description="集群名称，用于筛选"),
-    vm_name: Optional[str] = Field(default=None, description="虚拟机名称，支持模糊匹配")
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选")] = None,
+    vm_name: Annotated[Optional[str], Field(description="虚拟机名称，支持模糊匹配；也可传清单路径如 '/Datacenter/vm/app-01' 精确查找")] = None,
+    fields: Annotated[Optional[list[VMField]], Field(description="只返回这些字段（name 和 vm_id 总是返回），不填返回全部；字段越少查询越快")] = None
 ) -> MCPResult:
     """查询虚拟机列表"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
     try:
-        vms = client.get_virtual_machines(cluster_name, vm_name)
-        return MCPResult(success=True, data=vms)
+        vms = await run_blocking(client.get_virtual_machines, cluster_name, vm_name, fields)
+        return _ok(vms)
+    except Exception as e:
+        logger.error("查询虚拟机列表失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_vms"))
+
+
+@_describe_tool("CREATE_OPTIONS", default_ttl=60)
+async def describe_create_vm_options(
+    cluster_name: Annotated[Optional[str], Field(description="集群名称，用于筛选模板、资源池和网络")] = None
+) -> MCPResult:
+    """一次查询创建虚拟机所需的模板、集群、文件夹、资源池和网络"""
+    client, error = await acquire_vsphere_client()
+    if error:
+        return MCPResult.model_construct(success=False, error=error)
+
+    try:
+        # 各项查询互不依赖，并发执行
+        templates, clusters, folders, pools, networks = await asyncio.gather(
+            run_blocking(client.get_templates, cluster_name),
+            run_blocking(client.get_clusters),
+            run_blocking(client.get_folders),
+            run_blocking(client.get_resource_pools, cluster_name),
+            run_blocking(client.get_networks, cluster_name),
+        )
+        return _ok({
+            "templates": templates,
+            "clusters": clusters,
+            "folders": folders,
+            "resource_pools": pools,
+            "networks": networks
+        })
     except Exception as e:
-        logger.error(f"查询虚拟机列表失败: {e}")
-        return MCPResult(success=False, error=parse_vsphere_error(e, "describe_vms"))
+        logger.error("查询创建虚拟机选项失败: %s", e)
+        return MCPResult.model_construct(success=False, error=parse_vsphere_error(e, "describe_create_vm_options"))
 
 
 async def get_vm_power_state(
-    vm_name: str = Field(description="虚拟机名称")
+    vm_name: Annotated[str, Field(description="虚拟机名称")]
 ) -> MCPResult:
     """查询虚拟机的电源状态 (poweredOn/poweredOff/suspended)"""
-    client, error = get_vsphere_client()
+    client, error = await acquire_vsphere_client()
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
-    state, error = client.get_vm_power_state(vm_name)
+    state, error = await run_blocking(client.get_vm_power_state, vm_name)
     if error:
-        return MCPResult(success=False, error=error)
+        return MCPResult.model_construct(success=False, error=error)
     
-    return MCPResult(
-        success=True, 
-        data={
-            "vm_name": vm_name,
-            "power_state": state,
-            "can_reconfigure": state == "poweredOff"
-        }
-    )
+    return _ok({
+        "vm_name": vm_name,
+        "power_state": state,
+        "can_reconfigure": state == "poweredOff"
+    })
+
+
+async def get_vm_task(
+    task_id: Annotated[str, Field(description="createVMFromTemplate / reconfigureVM 返回的 task_id")]
+) -> MCPResult:
+    """查询虚拟机任务的执行状态 (queued/running/success/error) 和进度"""
+    client, error = await acquire_vsphere_client()
+    if error:
+        return MCPResult.model_construct(success=False, error=error)
+
+    info, error = await run_blocking(client.get_task_info, task_id)
+    if error:
+        return MCPResult.model_construct(success=False, error=error)
+
+    return _ok(info)
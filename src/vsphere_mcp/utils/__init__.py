@@ -21,6 +21,15 @@ from .validators import (
     validate_cpu_memory,
 )
 
+from .cache import (
+    TTLCache,
+    response_cache,
+    make_cache_key,
+    get_cache_ttl,
+)
+
+from .concurrency import run_blocking
+
 __all__ = [
     # 错误处理
     "TOOL_DESCRIBE_TEMPLATES",
@@ -36,4 +45,11 @@ __all__ = [
     "validate_cluster_name",
     "validate_network_name",
     "validate_cpu_memory",
+    # 响应缓存
+    "TTLCache",
+    "response_cache",
+    "make_cache_key",
+    "get_cache_ttl",
+    # 并发控制
+    "run_blocking",
 ]
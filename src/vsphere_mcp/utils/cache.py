@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+vSphere MCP Server - 响应缓存模块
+
+describe* 工具查询的清单数据（模板、集群、网络等）变化很少，而 LLM 在
+一次会话中往往会反复调用。这里提供一个进程内的 TTL 缓存，缓存已序列化的响应。
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..config import load_config
+
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存"""
+
+    # 处于 settle 窗口时，新写入条目的最长缓存时间（秒）
+    settle_ttl = 5.0
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._settle_until = 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取缓存，不存在或已过期时返回 None"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """写入缓存，ttl <= 0 时不缓存"""
+        if ttl <= 0:
+            return
+
+        now = time.monotonic()
+        if now < self._settle_until:
+            ttl = min(ttl, self.settle_ttl)
+        self._data[key] = (now + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self, settle: float = 0.0) -> None:
+        """
+        清空缓存
+
+        settle > 0 时，此后 settle 秒内写入的条目最多只缓存 settle_ttl 秒。
+        生命周期操作在 vCenter 任务提交后就清空缓存，任务执行期间查到的仍是
+        旧清单，缩短这段时间的缓存避免旧结果被按完整 TTL 重新缓存
+        """
+        self._data.clear()
+        if settle > 0:
+            self._settle_until = max(self._settle_until, time.monotonic() + settle)
+
+
+def make_cache_key(name: str, kwargs: Dict[str, Any]) -> Tuple:
+    """根据工具名称和参数生成缓存键（忽略值为 None 的参数，列表参数转为元组以便哈希）"""
+    return (name, tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in kwargs.items() if v is not None
+    )))
+
+
+def get_cache_ttl(name: str, default: float) -> float:
+    """读取缓存时间配置（Config.cache_ttls，环境变量 VSPHERE_CACHE_TTL_<NAME>），单位秒"""
+    return load_config().cache_ttls.get(name, default)
+
+
+# describe* 工具共享的响应缓存；生命周期操作提交任务后清空，任务执行期间只短时间缓存
+response_cache = TTLCache()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+vSphere MCP Server - 并发控制模块
+
+pyvmomi 是同步 SDK，工具函数通过 run_blocking 在线程池中执行 SOAP 调用。
+并发请求（SSE 传输或 describeVMCreateOptions 这类并发查询）共用同一个
+vCenter 会话，这里限制同时进行的调用数，避免瞬时请求过多压垮 vCenter。
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Optional, TypeVar
+
+from ..config import load_config
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# 首次调用时按配置创建，导入本模块时不读取环境变量
+_inflight: Optional[asyncio.Semaphore] = None
+
+
+def _get_inflight() -> asyncio.Semaphore:
+    """获取并发信号量，上限为 Config.max_inflight"""
+    global _inflight
+    if _inflight is None:
+        _inflight = asyncio.Semaphore(load_config().max_inflight)
+    return _inflight
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在线程池中执行阻塞调用，同时进行的调用数受 VSPHERE_MAX_INFLIGHT 限制"""
+    async with _get_inflight():
+        return await asyncio.to_thread(func, *args, **kwargs)
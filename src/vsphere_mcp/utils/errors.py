@@ -6,7 +6,7 @@ vSphere MCP Server - 错误处理模块
 """
 
 import logging
-from typing import Optional
+from typing import List, Optional
 
 from ..models import ErrorType, MCPError, ToolSuggestion
 
@@ -54,6 +54,136 @@ TOOL_DESCRIBE_NETWORKS = ToolSuggestion(
 )
 
 
+# =============================================================================
+# vSphere 错误解析
+# =============================================================================
+# 无相关工具时共享的空列表（MCPError 不可变，列表不会被修改）
+_NO_RELATED_TOOLS: List[ToolSuggestion] = []
+
+
+def _build_connection_error(error_msg: str, operation: str) -> MCPError:
+    """连接错误"""
+    return MCPError.model_construct(
+        error_type=ErrorType.CONNECTION_ERROR,
+        message=f"无法连接到 vSphere: {error_msg}",
+        suggestion="请检查 vSphere 主机地址、端口和网络连接",
+        related_tools=_NO_RELATED_TOOLS
+    )
+
+
+def _build_permission_error(error_msg: str, operation: str) -> MCPError:
+    """权限不足"""
+    return MCPError.model_construct(
+        error_type=ErrorType.PERMISSION_DENIED,
+        message=f"权限不足: {error_msg}",
+        suggestion="请检查用户名、密码和权限配置"
+    )
+
+
+def _not_found(parameter: str, message: str, suggestion: str, tool: ToolSuggestion) -> MCPError:
+    """构造资源不存在错误"""
+    return MCPError.model_construct(
+        error_type=ErrorType.RESOURCE_NOT_FOUND,
+        parameter=parameter,
+        message=message,
+        suggestion=suggestion,
+        related_tools=[tool]
+    )
+
+
+# 以下错误不包含原始错误信息，预先构造一次并直接复用（MCPError 不可变）
+# 资源不存在时，按操作名称定位出错的参数
+_NOT_FOUND_BY_OPERATION = (
+    ("template", _not_found("template_name", "指定的模板不存在",
+                            "请使用 describeTemplates 查询可用模板", TOOL_DESCRIBE_TEMPLATES)),
+    ("host", _not_found("host_name", "指定的主机不存在",
+                        "请使用 describeHosts 查询可用主机", TOOL_DESCRIBE_HOSTS)),
+    ("cluster", _not_found("cluster_name", "指定的集群不存在",
+                           "请使用 describeClusters 查询可用集群", TOOL_DESCRIBE_CLUSTERS)),
+    ("network", _not_found("network_name", "指定的网络不存在",
+                           "请使用 describeNetworks 查询可用网络", TOOL_DESCRIBE_NETWORKS)),
+)
+
+_ERR_QUOTA = MCPError.model_construct(
+    error_type=ErrorType.QUOTA_EXCEEDED,
+    message="资源不足",
+    suggestion="请检查主机资源使用情况，或选择其他主机/集群"
+)
+
+_ERR_DUPLICATE = MCPError.model_construct(
+    error_type=ErrorType.INVALID_PARAMETER,
+    parameter="vm_name",
+    message="虚拟机名称已存在",
+    suggestion="请使用不同的虚拟机名称"
+)
+
+
+def _build_not_found_error(error_msg: str, operation: str) -> Optional[MCPError]:
+    """资源不存在；无法从操作名称判断资源类型时返回 None，继续后续匹配"""
+    operation_lower = operation.lower()
+    for key, error in _NOT_FOUND_BY_OPERATION:
+        if key in operation_lower:
+            return error
+    return None
+
+
+def _build_quota_error(error_msg: str, operation: str) -> MCPError:
+    """资源不足"""
+    return _ERR_QUOTA
+
+
+def _build_duplicate_error(error_msg: str, operation: str) -> MCPError:
+    """冲突错误（名称重复）"""
+    return _ERR_DUPLICATE
+
+
+def _build_default_error(error_msg: str, operation: str) -> MCPError:
+    """默认错误处理"""
+    return MCPError.model_construct(
+        error_type=ErrorType.API_ERROR,
+        message=f"vSphere 操作失败: {error_msg}",
+        suggestion="请检查参数是否正确，或稍后重试"
+    )
+
+
+# 异常类型名 -> 错误构造函数；pyvmomi 故障取 WSDL 名称（如 InvalidLogin），其他异常取类名
+_ERROR_BY_FAULT = {
+    "ConnectionRefusedError": _build_connection_error,
+    "ConnectionResetError": _build_connection_error,
+    "TimeoutError": _build_connection_error,
+    "gaierror": _build_connection_error,
+    "InvalidLogin": _build_permission_error,
+    "NotAuthenticated": _build_permission_error,
+    "NoPermission": _build_permission_error,
+    "NotFound": _build_not_found_error,
+    "ManagedObjectNotFound": _build_not_found_error,
+    "InsufficientResourcesFault": _build_quota_error,
+    "InsufficientCpuResourcesFault": _build_quota_error,
+    "InsufficientMemoryResourcesFault": _build_quota_error,
+    "InsufficientHostCapacityFault": _build_quota_error,
+    "DuplicateName": _build_duplicate_error,
+    "AlreadyExists": _build_duplicate_error,
+    "FileAlreadyExists": _build_duplicate_error,
+}
+
+# 错误消息关键字（小写）-> 错误构造函数，按优先级排列；异常类型未命中时使用
+_ERROR_KEYWORDS = (
+    ("connection", _build_connection_error),
+    ("timeout", _build_connection_error),
+    ("permission", _build_permission_error),
+    ("access", _build_permission_error),
+    ("unauthorized", _build_permission_error),
+    ("not found", _build_not_found_error),
+    ("not exist", _build_not_found_error),
+    ("insufficient", _build_quota_error),
+    ("quota", _build_quota_error),
+    ("capacity", _build_quota_error),
+    ("duplicate", _build_duplicate_error),
+    ("conflict", _build_duplicate_error),
+    ("already exists", _build_duplicate_error),
+)
+
+
 def parse_vsphere_error(error: Exception, operation: str) -> MCPError:
     """
     解析 vSphere API 错误，转换为结构化的 MCPError
@@ -61,80 +191,22 @@ def parse_vsphere_error(error: Exception, operation: str) -> MCPError:
     这是 MCP 最佳实践的核心：将底层 API 错误转换为对 LLM 友好的错误信息
     """
     error_msg = str(error)
-    error_type = getattr(error, 'type', '') or ''
-
-    # 连接错误
-    if 'connection' in error_msg.lower() or 'timeout' in error_msg.lower():
-        return MCPError(
-            error_type=ErrorType.CONNECTION_ERROR,
-            message=f"无法连接到 vSphere: {error_msg}",
-            suggestion="请检查 vSphere 主机地址、端口和网络连接",
-            related_tools=[]
-        )
-
-    # 权限不足
-    if 'permission' in error_msg.lower() or 'access' in error_msg.lower() or 'unauthorized' in error_msg.lower():
-        return MCPError(
-            error_type=ErrorType.PERMISSION_DENIED,
-            message=f"权限不足: {error_msg}",
-            suggestion="请检查用户名、密码和权限配置"
-        )
-
-    # 资源不存在
-    if 'not found' in error_msg.lower() or 'not exist' in error_msg.lower():
-        if 'template' in operation.lower():
-            return MCPError(
-                error_type=ErrorType.RESOURCE_NOT_FOUND,
-                parameter="template_name",
-                message="指定的模板不存在",
-                suggestion="请使用 describeTemplates 查询可用模板",
-                related_tools=[TOOL_DESCRIBE_TEMPLATES]
-            )
-        elif 'host' in operation.lower():
-            return MCPError(
-                error_type=ErrorType.RESOURCE_NOT_FOUND,
-                parameter="host_name",
-                message="指定的主机不存在",
-                suggestion="请使用 describeHosts 查询可用主机",
-                related_tools=[TOOL_DESCRIBE_HOSTS]
-            )
-        elif 'cluster' in operation.lower():
-            return MCPError(
-                error_type=ErrorType.RESOURCE_NOT_FOUND,
-                parameter="cluster_name",
-                message="指定的集群不存在",
-                suggestion="请使用 describeClusters 查询可用集群",
-                related_tools=[TOOL_DESCRIBE_CLUSTERS]
-            )
-        elif 'network' in operation.lower():
-            return MCPError(
-                error_type=ErrorType.RESOURCE_NOT_FOUND,
-                parameter="network_name",
-                message="指定的网络不存在",
-                suggestion="请使用 describeNetworks 查询可用网络",
-                related_tools=[TOOL_DESCRIBE_NETWORKS]
-            )
-
-    # 资源不足
-    if 'insufficient' in error_msg.lower() or 'quota' in error_msg.lower() or 'capacity' in error_msg.lower():
-        return MCPError(
-            error_type=ErrorType.QUOTA_EXCEEDED,
-            message="资源不足",
-            suggestion="请检查主机资源使用情况，或选择其他主机/集群"
-        )
-
-    # 冲突错误（名称重复）
-    if 'duplicate' in error_msg.lower() or 'conflict' in error_msg.lower() or 'already exists' in error_msg.lower():
-        return MCPError(
-            error_type=ErrorType.INVALID_PARAMETER,
-            parameter="vm_name",
-            message="虚拟机名称已存在",
-            suggestion="请使用不同的虚拟机名称"
-        )
-
-    # 默认错误处理
-    return MCPError(
-        error_type=ErrorType.API_ERROR,
-        message=f"vSphere 操作失败: {error_msg}",
-        suggestion="请检查参数是否正确，或稍后重试"
-    )
+
+    # 先按异常类型直接分派
+    error_class = type(error)
+    builder = _ERROR_BY_FAULT.get(getattr(error_class, '_wsdlName', None) or error_class.__name__)
+    if builder is not None:
+        mcp_error = builder(error_msg, operation)
+        if mcp_error is not None:
+            return mcp_error
+
+    # 再按错误消息关键字匹配
+    msg_lower = error_msg.lower()
+
+    for keyword, builder in _ERROR_KEYWORDS:
+        if keyword in msg_lower:
+            mcp_error = builder(error_msg, operation)
+            if mcp_error is not None:
+                return mcp_error
+
+    return _build_default_error(error_msg, operation)
@@ -10,19 +10,51 @@ from ..models import ErrorType, MCPError
 from .errors import TOOL_DESCRIBE_TEMPLATES, TOOL_DESCRIBE_CLUSTERS, TOOL_DESCRIBE_NETWORKS
 
 
+# 预编译的校验正则
+_VM_NAME_RE = re.compile(r'[a-zA-Z0-9_-]+')
+
+
+# 不含参数值的错误是固定的，预先构造一次并直接复用
+_ERR_MISSING_VM_NAME = MCPError.model_construct(
+    error_type=ErrorType.MISSING_PARAMETER,
+    parameter="vm_name",
+    message="缺少必需参数: vm_name (虚拟机名称)",
+    suggestion="请提供有效的虚拟机名称，如 'web-server-01'"
+)
+
+_ERR_MISSING_TEMPLATE_NAME = MCPError.model_construct(
+    error_type=ErrorType.MISSING_PARAMETER,
+    parameter="template_name",
+    message="缺少必需参数: template_name (模板名称)",
+    suggestion="请先使用 describeTemplates 查询可用模板",
+    related_tools=[TOOL_DESCRIBE_TEMPLATES]
+)
+
+_ERR_MISSING_CLUSTER_NAME = MCPError.model_construct(
+    error_type=ErrorType.MISSING_PARAMETER,
+    parameter="cluster_name",
+    message="缺少必需参数: cluster_name (集群名称)",
+    suggestion="请先使用 describeClusters 查询可用集群",
+    related_tools=[TOOL_DESCRIBE_CLUSTERS]
+)
+
+_ERR_EMPTY_NETWORK_NAME = MCPError.model_construct(
+    error_type=ErrorType.INVALID_PARAMETER,
+    parameter="network_name",
+    message="网络名称不能为空",
+    suggestion="请先使用 describeNetworks 查询可用网络",
+    related_tools=[TOOL_DESCRIBE_NETWORKS]
+)
+
+
 def validate_vm_name(vm_name: Optional[str]) -> Optional[MCPError]:
     """验证虚拟机名称"""
     if not vm_name:
-        return MCPError(
-            error_type=ErrorType.MISSING_PARAMETER,
-            parameter="vm_name",
-            message="缺少必需参数: vm_name (虚拟机名称)",
-            suggestion="请提供有效的虚拟机名称，如 'web-server-01'"
-        )
+        return _ERR_MISSING_VM_NAME
 
     # 检查名称长度和格式
-    if len(vm_name) < 3 or len(vm_name) > 80:
-        return MCPError(
+    if not 3 <= len(vm_name) <= 80:
+        return MCPError.model_construct(
             error_type=ErrorType.INVALID_PARAMETER,
             parameter="vm_name",
             message=f"虚拟机名称长度必须在 3-80 字符之间: '{vm_name}'",
@@ -30,8 +62,8 @@ def validate_vm_name(vm_name: Optional[str]) -> Optional[MCPError]:
         )
 
     # 检查特殊字符
-    if not re.match(r'^[a-zA-Z0-9_-]+$', vm_name):
-        return MCPError(
+    if not _VM_NAME_RE.fullmatch(vm_name):
+        return MCPError.model_construct(
             error_type=ErrorType.INVALID_PARAMETER,
             parameter="vm_name",
             message=f"虚拟机名称包含无效字符: '{vm_name}'",
@@ -43,28 +75,12 @@ def validate_vm_name(vm_name: Optional[str]) -> Optional[MCPError]:
 
 def validate_template_name(template_name: Optional[str]) -> Optional[MCPError]:
     """验证模板名称"""
-    if not template_name:
-        return MCPError(
-            error_type=ErrorType.MISSING_PARAMETER,
-            parameter="template_name",
-            message="缺少必需参数: template_name (模板名称)",
-            suggestion="请先使用 describeTemplates 查询可用模板",
-            related_tools=[TOOL_DESCRIBE_TEMPLATES]
-        )
-    return None
+    return _ERR_MISSING_TEMPLATE_NAME if not template_name else None
 
 
 def validate_cluster_name(cluster_name: Optional[str]) -> Optional[MCPError]:
     """验证集群名称"""
-    if not cluster_name:
-        return MCPError(
-            error_type=ErrorType.MISSING_PARAMETER,
-            parameter="cluster_name",
-            message="缺少必需参数: cluster_name (集群名称)",
-            suggestion="请先使用 describeClusters 查询可用集群",
-            related_tools=[TOOL_DESCRIBE_CLUSTERS]
-        )
-    return None
+    return _ERR_MISSING_CLUSTER_NAME if not cluster_name else None
 
 
 def validate_network_name(network_name: Optional[str]) -> Optional[MCPError]:
@@ -74,20 +90,14 @@ def validate_network_name(network_name: Optional[str]) -> Optional[MCPError]:
         return None
         
     if len(network_name) < 1:
-        return MCPError(
-            error_type=ErrorType.INVALID_PARAMETER,
-            parameter="network_name",
-            message="网络名称不能为空",
-            suggestion="请先使用 describeNetworks 查询可用网络",
-            related_tools=[TOOL_DESCRIBE_NETWORKS]
-        )
+        return _ERR_EMPTY_NETWORK_NAME
     return None
 
 
 def validate_cpu_memory(cpu: Optional[int], memory: Optional[int]) -> Optional[MCPError]:
     """验证 CPU 和内存参数"""
     if cpu and (cpu < 1 or cpu > 128):
-        return MCPError(
+        return MCPError.model_construct(
             error_type=ErrorType.INVALID_PARAMETER,
             parameter="cpu",
             message=f"CPU 核数必须在 1-128 之间: {cpu}",
@@ -95,7 +105,7 @@ def validate_cpu_memory(cpu: Optional[int], memory: Optional[int]) -> Optional[M
         )
 
     if memory and (memory < 512 or memory > 1048576):
-        return MCPError(
+        return MCPError.model_construct(
             error_type=ErrorType.INVALID_PARAMETER,
             parameter="memory",
             message=f"内存大小必须在 512MB-1TB 之间: {memory}MB",